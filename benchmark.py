@@ -0,0 +1,117 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from src.domains import DOMAINS
+from src.policy import Policy, parse_names
+from src.policy_graph import PolicyGraph
+from src.synthetic import synthetic_policy
+from src.tarjan import Tarjan
+
+# all domains and synthetic policies with 4 to 12 features
+# python3 benchmark.py --synthetic-features 4 6 8 10 12 --output bench.json
+
+
+def run_phases(boolean_names, numerical_names, rules_description, engine):
+    """ Run parsing, graph construction, scc computation and the sieve and return their wall times.
+        The sieve runs on the graph after the scc phase, which does not modify it.
+    """
+    timings = dict()
+    start = time.perf_counter()
+    policy = Policy(boolean_names, numerical_names, rules_description)
+    timings["parse_seconds"] = time.perf_counter() - start
+    start = time.perf_counter()
+    policy_graph = PolicyGraph(policy, engine=engine)
+    timings["construction_seconds"] = time.perf_counter() - start
+    state_ids = range(policy_graph.num_states)
+    start = time.perf_counter()
+    sccs = Tarjan().compute_sccs(state_ids, policy_graph.graph.successors)
+    timings["scc_seconds"] = time.perf_counter() - start
+    start = time.perf_counter()
+    terminating = policy_graph.sieve(state_ids)
+    timings["sieve_seconds"] = time.perf_counter() - start
+    info = {
+        "features": policy.get_num_features(),
+        "rules": len(policy.rules),
+        "states": policy_graph.num_states,
+        "edges": policy_graph.graph.num_edges,
+        "sccs": len(sccs),
+        "verdict": "Terminating" if terminating else "Non-terminating",
+    }
+    return info, timings
+
+
+def run_case(name, boolean_names, numerical_names, rules_description, engine, repeat, memory):
+    """ Benchmark a policy. The fastest time of each phase over the repetitions is reported.
+        Peak memory is measured with tracemalloc in a separate run so that it does not slow down the timings.
+    """
+    result = {"name": name}
+    best = dict()
+    for _ in range(repeat):
+        info, timings = run_phases(boolean_names, numerical_names, rules_description, engine)
+        for phase, seconds in timings.items():
+            best[phase] = min(seconds, best.get(phase, seconds))
+    result.update(info)
+    result.update(best)
+    result["total_seconds"] = sum(best.values())
+    if memory:
+        tracemalloc.start()
+        run_phases(boolean_names, numerical_names, rules_description, engine)
+        result["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sieve Algorithm benchmarks")
+    parser.add_argument("--domains", nargs="*", default=list(DOMAINS), help="The example domains to run (default: all)")
+    parser.add_argument("--synthetic-features", type=int, nargs="*", default=[], help="The numbers of features of the synthetic policies")
+    parser.add_argument("--synthetic-rules", type=int, default=8, help="The number of rules of the synthetic policies")
+    parser.add_argument("--unknown-density", type=float, default=0.3, help="The probability of an e_unk effect on a feature")
+    parser.add_argument("--seed", type=int, default=0, help="The seed of the synthetic policies")
+    parser.add_argument("--engine", choices=["python", "numpy"], default="python", help="The engine that builds the policy graph")
+    parser.add_argument("--repeat", type=int, default=3, help="The number of repetitions of each case")
+    parser.add_argument("--no-memory", action="store_true", help="Do not measure the peak memory")
+    parser.add_argument("--output", type=str, help="The JSON output file (default: stdout)")
+    args = parser.parse_args()
+
+    cases = []
+    for name in args.domains:
+        booleans, numericals, rules = DOMAINS[name]
+        cases.append((name, parse_names(booleans), parse_names(numericals), rules))
+    for num_features in args.synthetic_features:
+        num_booleans = num_features // 2
+        booleans, numericals, rules = synthetic_policy(num_booleans, num_features - num_booleans, args.synthetic_rules,
+                                                       args.unknown_density, seed=args.seed)
+        cases.append(("synthetic-%d" % num_features, booleans, numericals, rules))
+
+    results = []
+    for name, booleans, numericals, rules in cases:
+        result = run_case(name, booleans, numericals, rules, args.engine, args.repeat, not args.no_memory)
+        print("%s: %.4fs" % (name, result["total_seconds"]), file=sys.stderr)
+        results.append(result)
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "engine": args.engine,
+        "synthetic_rules": args.synthetic_rules,
+        "unknown_density": args.unknown_density,
+        "seed": args.seed,
+        "cases": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
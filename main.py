@@ -1,7 +1,22 @@
 import argparse
+import cProfile
+import json
+import sys
+from contextlib import nullcontext
 
 from src.policy_graph import PolicyGraph
-from src.policy import Policy
+from src.batch import BatchVerifier
+from src.budget import Budget, BudgetExceeded
+from src.cache import ResultCache, canonical_key
+from src.policy import Policy, parse_names
+from src.policy_file import load_policy, save_policy
+from src.precheck import NonTerminationPrecheck
+from src.reachable import ReachablePolicyGraph
+from src.reduction import PolicyReducer
+from src.server import VerificationServer
+from src.stats import Stats
+from src.symbolic import SymbolicPolicyGraph
+from src.symmetry import SymmetricPolicyGraph
 
 # test
 # python3 main.py "[b]" "[n]" "[[[c_gt(n)],[e_dec(n)]], [[c_pos(b)], [e_neg(b)]]]"
@@ -28,20 +43,184 @@ from src.policy import Policy
 # python3 main.py "[h, o]" "[p1, p2, p3]" "[[[c_gt(p1)],[e_dec(p1),e_unk(p2),e_unk(p3),e_pos(o)]], [[c_eq(p1),c_gt(p2)],[e_dec(p2),e_unk(p3),e_pos(o)]], [[c_eq(p1), c_eq(p2), c_gt(p3)],[e_dec(p3), e_pos(o)]], [[c_pos(o)],[e_neg(o)]]]"
 
 
+# exit codes: 0 Terminating, 1 Non-terminating, 3 Unknown (budget exceeded), 4 Error (invalid policy, I/O or failed check)
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Sieve Algorithm")
-    parser.add_argument("booleans", type=str, help="A list of names of boolean features, e.g., [b,]")
-    parser.add_argument("numericals", type=str, help="A list of names of boolean features, e.g., [n,]")
-    parser.add_argument("rules", type=str, help="A list of policy rules, e.g., [[[c_gt(n)],[e_dec(n)]], [[c_pos(b)], [e_neg(b)]]]")
+    parser.add_argument("booleans", type=str, nargs="?", help="A list of names of boolean features, e.g., [b,]")
+    parser.add_argument("numericals", type=str, nargs="?", help="A list of names of boolean features, e.g., [n,]")
+    parser.add_argument("rules", type=str, nargs="?", help="A list of policy rules, e.g., [[[c_gt(n)],[e_dec(n)]], [[c_pos(b)], [e_neg(b)]]]")
+    parser.add_argument("--policy-file", type=str, help="Load the policy from a JSON or binary policy file instead of the positional arguments")
+    parser.add_argument("--save-policy", type=str, help="Write the policy to a JSON file if the path ends with .json and to a binary file otherwise")
+    parser.add_argument("--engine", choices=["python", "numpy", "parallel", "symbolic"], default="python", help="The engine that builds the policy graph, parallel uses --processes workers, symbolic uses binary decision diagrams")
+    parser.add_argument("--initial", type=str, help="Only verify the states reachable from the states that satisfy a list of conditions, e.g., [c_pos(b), c_gt(n)]")
+    parser.add_argument("--no-precheck", action="store_true", help="Skip the search for short rule cycles without progress before the full sieve")
+    parser.add_argument("--reduce", action="store_true", help="Remove irrelevant features and prune states that are on no cycle")
+    parser.add_argument("--symmetry", action="store_true", help="Sieve one scc per orbit under the permutations of interchangeable slots of features")
+    parser.add_argument("--symmetry-check", action="store_true", help="Like --symmetry, but also compare the verdict with the full sieve")
+    parser.add_argument("--memory", action="store_true", help="Print the memory footprint of the policy graph")
+    parser.add_argument("--batch", type=str, help="Verify the policies of a JSONL file (- for stdin) with the fields booleans, numericals and rules")
+    parser.add_argument("--serve", type=str, help="Serve verification requests in the format of --batch on this Unix socket")
+    parser.add_argument("--max-pending", type=int, help="The number of verifications in flight before the server stops reading requests (default: 4 per process)")
+    parser.add_argument("--processes", type=int, help="The number of worker processes in batch and server mode and of the parallel engine (default: number of CPUs)")
+    parser.add_argument("--timeout", type=float, help="The timeout in seconds per policy in batch and server mode")
+    parser.add_argument("--sieve-processes", type=int, help="Sieve the sccs of the policy graph in this many worker processes")
+    parser.add_argument("--graph-cache", type=str, help="A graph file that is memory-mapped if it matches the policy and rebuilt otherwise")
+    parser.add_argument("--max-states", type=int, help="Give up with Unknown if the policy graph has more states, per policy in batch and server mode")
+    parser.add_argument("--max-edges", type=int, help="Give up with Unknown if the policy graph gets more edges, per policy in batch and server mode")
+    parser.add_argument("--max-memory", type=float, help="Give up with Unknown if the resident memory exceeds this many MiB, per policy in batch and server mode")
+    parser.add_argument("--max-seconds", type=float, help="Give up with Unknown if graph construction and sieve take longer, per policy in batch and server mode")
+    parser.add_argument("--cache", type=str, help="An sqlite file that caches verdicts by the canonical form of the policy")
+    parser.add_argument("--cache-size", type=int, default=10000, help="The number of verdicts kept in memory")
+    parser.add_argument("--stats", action="store_true", help="Print counters and timings of the verification")
+    parser.add_argument("--stats-json", type=str, help="Write counters and timings of the verification to a JSON file")
+    parser.add_argument("--profile", type=str, help="Write a cProfile capture of graph construction and sieve to a file")
     args = parser.parse_args()
 
-    boolean_names = [x.strip() for x in args.booleans.strip('][').split(',') if x]
-    numerical_names = [x.strip() for x in args.numericals.strip('][').split(',') if x]
-    rules_description = args.rules
+    # the workers of batch and server mode cannot start the pool of the parallel engine
+    if (args.batch or args.serve) and args.engine == "parallel":
+        parser.error("--engine parallel cannot be combined with --batch or --serve")
+    # the symbolic engine has no explicit states and edges, only its time and memory are limited
+    if args.engine == "symbolic" and (args.max_states is not None or args.max_edges is not None):
+        parser.error("--max-states and --max-edges cannot be combined with the symbolic engine")
+    # errors must not be mistaken for a verdict, so they get an exit code of their own
+    try:
+        cache = ResultCache(args.cache_size, args.cache) if args.cache else None
+        limits = (args.max_states, args.max_edges,
+                  int(args.max_memory * 2 ** 20) if args.max_memory is not None else None, args.max_seconds)
+        if args.serve:
+            # the server always keeps the verdicts of the current process
+            cache = cache or ResultCache(args.cache_size)
+            VerificationServer(args.serve, args.processes, args.timeout, args.engine, cache, args.max_pending,
+                               limits=limits).serve()
+            cache.close()
+            sys.exit(0)
+        if args.batch:
+            lines = sys.stdin if args.batch == "-" else open(args.batch)
+            with lines:
+                stats = BatchVerifier(args.processes, args.timeout, args.engine, cache, limits).run(lines)
+            print(json.dumps(stats), file=sys.stderr)
+            sys.exit(0)
+        if args.initial and (args.reduce or args.symmetry or args.symmetry_check or args.engine == "symbolic"):
+            parser.error("--initial cannot be combined with --reduce, --symmetry or the symbolic engine")
+        # the reachable graph is built on demand with the python engine, so these options would be ignored
+        if args.initial and (args.engine in ("numpy", "parallel") or args.graph_cache or args.memory or args.sieve_processes):
+            parser.error("--initial cannot be combined with the numpy or parallel engine, --graph-cache, --memory or --sieve-processes")
+        if args.policy_file:
+            policy = load_policy(args.policy_file)
+        elif args.booleans is None or args.numericals is None or args.rules is None:
+            parser.error("booleans, numericals and rules are required")
+        else:
+            boolean_names = parse_names(args.booleans)
+            numerical_names = parse_names(args.numericals)
+            rules_description = args.rules
 
-    policy = Policy(boolean_names, numerical_names, rules_description)
-    policy_graph = PolicyGraph(policy)
-    if policy_graph.sieve([i for i in range(policy_graph.num_states)]):
+            policy = Policy(boolean_names, numerical_names, rules_description)
+        if args.save_policy:
+            save_policy(args.save_policy, policy)
+        terminating = None
+        stats = Stats() if args.stats or args.stats_json else None
+        # cached verdicts and witnesses hold for all states, not only for the reachable ones
+        if args.initial:
+            cache = None
+        if cache is not None:
+            key = canonical_key(policy)
+            terminating = cache.get(key)
+            if stats is not None and terminating is not None:
+                stats.verdict_source = "cache"
+        if args.reduce:
+            policy, report = PolicyReducer().reduce(policy)
+        if terminating is None and not args.no_precheck and not args.initial:
+            with stats.phase("precheck") if stats is not None else nullcontext():
+                witness = NonTerminationPrecheck().find_witness(policy)
+            if witness is not None:
+                print(witness)
+                terminating = False
+                if stats is not None:
+                    stats.verdict_source = "precheck"
+                if cache is not None:
+                    cache.put(key, terminating)
+        if terminating is None:
+            budget = Budget(*limits)
+            if args.engine == "symbolic":
+                with stats.phase("sieve") if stats is not None else nullcontext():
+                    try:
+                        terminating = SymbolicPolicyGraph(policy, budget=budget).sieve()
+                    except BudgetExceeded as e:
+                        exceeded = e
+                if stats is not None:
+                    stats.verdict_source = "symbolic"
+            elif args.symmetry or args.symmetry_check:
+                with stats.phase("sieve") if stats is not None else nullcontext():
+                    try:
+                        symmetric_graph = SymmetricPolicyGraph(policy, budget=budget)
+                        terminating = symmetric_graph.sieve()
+                    except BudgetExceeded as e:
+                        exceeded = e
+                if stats is not None:
+                    stats.verdict_source = "symmetry"
+                if terminating is not None:
+                    print(symmetric_graph.report())
+                if args.symmetry_check and terminating is not None:
+                    try:
+                        policy_graph = PolicyGraph(policy, engine=args.engine, processes=args.processes, budget=budget)
+                        if policy_graph.sieve(range(policy_graph.num_states)) != terminating:
+                            raise Exception("The verdict on the quotient graph differs from the full sieve.")
+                        print("Symmetry check: passed")
+                    except BudgetExceeded as e:
+                        print("Symmetry check: skipped (%s)" % e)
+            else:
+                if stats is not None:
+                    stats.verdict_source = "reachable" if args.initial else "graph"
+                profiler = cProfile.Profile() if args.profile else None
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    if args.initial:
+                        reachable_graph = ReachablePolicyGraph(policy, stats=stats, budget=budget)
+                        terminating = reachable_graph.sieve(reachable_graph.initial_states(args.initial))
+                        print("Reachable states: %d of %d" % (reachable_graph.num_reachable, reachable_graph.num_states))
+                    else:
+                        policy_graph = PolicyGraph(policy, engine=args.engine, stats=stats, processes=args.processes,
+                                                   cache_path=args.graph_cache, budget=budget)
+                        if args.memory:
+                            footprint = policy_graph.graph.memory_footprint()
+                            print("Edges: %d" % policy_graph.graph.num_edges)
+                            for name, size in footprint.items():
+                                print("%s: %s bytes" % (name, size if name != "per_edge" else "%.2f" % size))
+                        state_ids = [i for i in range(policy_graph.num_states)]
+                        if args.reduce:
+                            remaining = policy_graph.prune(state_ids)
+                            report.num_states = policy_graph.num_states
+                            report.pruned_states = policy_graph.num_states - len(remaining)
+                            state_ids = remaining
+                        terminating = policy_graph.sieve(state_ids, processes=args.sieve_processes)
+                except BudgetExceeded as e:
+                    exceeded = e
+                if profiler is not None:
+                    profiler.disable()
+                    profiler.dump_stats(args.profile)
+            if cache is not None and terminating is not None:
+                cache.put(key, terminating)
+        if args.stats:
+            print(stats)
+        if args.stats_json:
+            with open(args.stats_json, "w") as f:
+                json.dump(stats.to_dict(), f, indent=2)
+        if cache is not None:
+            print("Cache: %s" % json.dumps(cache.stats()))
+            cache.close()
+        if args.reduce:
+            print(report)
+    except Exception as e:
+        print("Error: %s" % e, file=sys.stderr)
+        sys.exit(4)
+    if terminating is None:
+        print("Partial stats: %s" % json.dumps(exceeded.partial_stats))
+        print("Unknown (budget exceeded): %s" % exceeded)
+        sys.exit(3)
+    elif terminating:
         print("Terminating")
+        sys.exit(0)
     else:
         print("Non-terminating")
+        sys.exit(1)
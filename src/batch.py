@@ -0,0 +1,201 @@
+import json
+import math
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .budget import Budget, BudgetExceeded
+from .cache import canonical_key
+from .policy import Policy, parse_names
+from .policy_graph import PolicyGraph
+from .precheck import NonTerminationPrecheck
+from .symbolic import SymbolicPolicyGraph
+
+
+class VerificationTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise VerificationTimeout()
+
+
+def verify(policy, engine="python", budget=None):
+    """ Return whether the policy is terminating. Short rule cycles without progress are searched first.
+        The budget limits the construction and sieve of the policy graph and raises BudgetExceeded.
+    """
+    if NonTerminationPrecheck().find_witness(policy) is not None:
+        return False
+    if engine == "symbolic":
+        return SymbolicPolicyGraph(policy, budget=budget).sieve()
+    policy_graph = PolicyGraph(policy, engine=engine, budget=budget)
+    return policy_graph.sieve(range(policy_graph.num_states))
+
+
+def parse_request(request):
+    return Policy(parse_names(request["booleans"]), parse_names(request["numericals"]), request["rules"])
+
+
+def _verify_task(task, parse=parse_request):
+    """ Verify a single policy in a worker process. The timeout is enforced with SIGALRM.
+        limits are the arguments of a Budget or None, a policy that exceeds them is Unknown.
+        parse turns the request into a policy.
+    """
+    result_id, request, engine, timeout, limits = task
+    result = {"id": result_id}
+    start = time.perf_counter()
+    if timeout:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        policy = parse(request)
+        budget = Budget(*limits) if limits is not None else None
+        result["result"] = "Terminating" if verify(policy, engine, budget) else "Non-terminating"
+    except VerificationTimeout:
+        result["result"] = "Timeout"
+    except BudgetExceeded as e:
+        result["result"] = "Unknown"
+        result["error"] = str(e)
+        result["partial_stats"] = e.partial_stats
+    except Exception as e:
+        result["result"] = "Error"
+        result["error"] = str(e)
+    finally:
+        if timeout:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def percentile(values, p):
+    """ Nearest-rank percentile of a list of values.
+    """
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+class BatchVerifier:
+    """ Verifies policies given as JSON lines with the fields booleans, numericals and rules
+        (and an optional id) in a pool of worker processes.
+        Results are written as JSON lines in completion order as soon as they are available.
+        If a ResultCache is given, cached verdicts are written without verifying the policy again.
+        limits are the arguments of the Budget of each verification or None.
+        If a worker dies, the policies in flight in the pool are reported as Error and the pool is replaced.
+    """
+    def __init__(self, processes=None, timeout=None, engine="python", cache=None, limits=None):
+        self.processes = processes
+        self.timeout = timeout
+        self.engine = engine
+        self.cache = cache
+        self.limits = limits
+
+    def run(self, lines, output=sys.stdout):
+        """ Verify the policies and return the throughput statistics.
+            The latencies include only the policies that were verified.
+        """
+        self.output = output
+        self.latencies = []
+        self.counts = dict()
+        self.num_pool_restarts = 0
+        # results are written by the callbacks of the pool, the condition guards the output, the cache and the counts
+        self.condition = threading.Condition()
+        self.num_pending = 0
+        start = time.perf_counter()
+        self.executor = ProcessPoolExecutor(self.processes)
+        try:
+            for line_number, line in enumerate(lines):
+                line = line.strip()
+                if not line:
+                    continue
+                # a malformed line is reported like a failed verification and does not stop the batch
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as e:
+                    self._write({"id": line_number, "result": "Error", "error": "Invalid JSON: %s" % e, "seconds": 0.0})
+                    continue
+                if not isinstance(request, dict):
+                    self._write({"id": line_number, "result": "Error", "error": "Expected a JSON object",
+                                 "seconds": 0.0})
+                    continue
+                result_id = request.get("id", line_number)
+                key = None
+                if self.cache is not None:
+                    key = self._key(request)
+                    with self.condition:
+                        terminating = self.cache.get(key) if key is not None else None
+                    if terminating is not None:
+                        self._write({"id": result_id, "result": "Terminating" if terminating else "Non-terminating",
+                                     "seconds": 0.0, "cached": True})
+                        continue
+                self._submit((result_id, request, self.engine, self.timeout, self.limits), key)
+            with self.condition:
+                self.condition.wait_for(lambda: self.num_pending == 0)
+        finally:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+        seconds = time.perf_counter() - start
+        num_policies = sum(self.counts.values())
+        stats = {
+            "policies": num_policies,
+            "results": self.counts,
+            "seconds": seconds,
+            "policies_per_second": num_policies / seconds if seconds > 0 else 0.0,
+            "p50_latency": percentile(self.latencies, 50),
+            "p99_latency": percentile(self.latencies, 99),
+            "pool_restarts": self.num_pool_restarts,
+        }
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        return stats
+
+    def _submit(self, task, key):
+        with self.condition:
+            self.num_pending += 1
+        try:
+            future = self.executor.submit(_verify_task, task)
+        except BrokenProcessPool:
+            # the callbacks of the tasks that were in flight report them, the pool is replaced once
+            self.executor.shutdown(wait=False)
+            self.executor = ProcessPoolExecutor(self.processes)
+            self.num_pool_restarts += 1
+            future = self.executor.submit(_verify_task, task)
+        future.add_done_callback(lambda future: self._receive(future, task[0], key))
+
+    def _key(self, request):
+        """ Return the cache key of a request or None if the policy cannot be parsed.
+        """
+        try:
+            return canonical_key(parse_request(request))
+        except Exception:
+            return None
+
+    def _receive(self, future, result_id, key):
+        verified = False
+        if future.cancelled():
+            result = {"id": result_id, "result": "Error", "error": "The verification was cancelled", "seconds": 0.0}
+        elif isinstance(future.exception(), BrokenProcessPool):
+            result = {"id": result_id, "result": "Error", "error": "The worker process terminated abruptly",
+                      "seconds": 0.0}
+        elif future.exception() is not None:
+            result = {"id": result_id, "result": "Error", "error": str(future.exception()), "seconds": 0.0}
+        else:
+            result = future.result()
+            verified = True
+        with self.condition:
+            if key is not None and result["result"] in ("Terminating", "Non-terminating"):
+                self.cache.put(key, result["result"] == "Terminating")
+            self._write(result, verified)
+            self.num_pending -= 1
+            self.condition.notify_all()
+
+    def _write(self, result, verified=False):
+        with self.condition:
+            self.output.write(json.dumps(result) + "\n")
+            self.output.flush()
+            if verified:
+                self.latencies.append(result["seconds"])
+            self.counts[result["result"]] = self.counts.get(result["result"], 0) + 1
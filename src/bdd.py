@@ -0,0 +1,177 @@
+
+class BDD:
+    """ Reduced ordered binary decision diagrams.
+        Nodes are integers: 0 is false and 1 is true. Variables are ordered by their index.
+        Every node is unique through the unique table and all operations are memoized.
+        Sets of variables are given as bitmasks over the variable indices.
+    """
+    def __init__(self, num_vars, max_cache_size=1000000):
+        self.num_vars = num_vars
+        self.max_cache_size = max_cache_size
+        # terminals are placed below the last variable
+        self.var = [num_vars, num_vars]
+        self.low = [0, 1]
+        self.high = [0, 1]
+        self.unique = dict()
+        self.cache = dict()
+
+    def mk(self, var, low, high):
+        """ Return the unique node with the given variable and children.
+        """
+        if low == high:
+            return low
+        key = (var, low, high)
+        node = self.unique.get(key)
+        if node is None:
+            node = len(self.var)
+            self.var.append(var)
+            self.low.append(low)
+            self.high.append(high)
+            self.unique[key] = node
+        return node
+
+    def variable(self, var):
+        return self.mk(var, 0, 1)
+
+    def _lookup(self, key):
+        return self.cache.get(key)
+
+    def _store(self, key, node):
+        if len(self.cache) >= self.max_cache_size:
+            self.cache.clear()
+        self.cache[key] = node
+        return node
+
+    def _cofactors(self, node, var):
+        if self.var[node] == var:
+            return self.low[node], self.high[node]
+        return node, node
+
+    def conjoin(self, f, g):
+        if f == 0 or g == 0:
+            return 0
+        if f == 1 or f == g:
+            return g
+        if g == 1:
+            return f
+        if f > g:
+            f, g = g, f
+        key = ("and", f, g)
+        result = self._lookup(key)
+        if result is not None:
+            return result
+        var = min(self.var[f], self.var[g])
+        f0, f1 = self._cofactors(f, var)
+        g0, g1 = self._cofactors(g, var)
+        return self._store(key, self.mk(var, self.conjoin(f0, g0), self.conjoin(f1, g1)))
+
+    def disjoin(self, f, g):
+        if f == 1 or g == 1:
+            return 1
+        if f == 0 or f == g:
+            return g
+        if g == 0:
+            return f
+        if f > g:
+            f, g = g, f
+        key = ("or", f, g)
+        result = self._lookup(key)
+        if result is not None:
+            return result
+        var = min(self.var[f], self.var[g])
+        f0, f1 = self._cofactors(f, var)
+        g0, g1 = self._cofactors(g, var)
+        return self._store(key, self.mk(var, self.disjoin(f0, g0), self.disjoin(f1, g1)))
+
+    def negate(self, f):
+        if f <= 1:
+            return 1 - f
+        key = ("not", f)
+        result = self._lookup(key)
+        if result is not None:
+            return result
+        return self._store(key, self.mk(self.var[f], self.negate(self.low[f]), self.negate(self.high[f])))
+
+    def difference(self, f, g):
+        return self.conjoin(f, self.negate(g))
+
+    def exists(self, f, variables):
+        """ Existentially quantify the variables of the bitmask.
+        """
+        if f <= 1:
+            return f
+        key = ("exists", f, variables)
+        result = self._lookup(key)
+        if result is not None:
+            return result
+        var = self.var[f]
+        if variables >> var == 0:
+            return f
+        low = self.exists(self.low[f], variables)
+        high = self.exists(self.high[f], variables)
+        if (variables >> var) & 1:
+            result = self.disjoin(low, high)
+        else:
+            result = self.mk(var, low, high)
+        return self._store(key, result)
+
+    def and_exists(self, f, g, variables):
+        """ Relational product: existentially quantify the variables of the bitmask in f and g.
+        """
+        if f == 0 or g == 0:
+            return 0
+        if f == 1:
+            return self.exists(g, variables)
+        if g == 1 or f == g:
+            return self.exists(f, variables)
+        if f > g:
+            f, g = g, f
+        key = ("and_exists", f, g, variables)
+        result = self._lookup(key)
+        if result is not None:
+            return result
+        var = min(self.var[f], self.var[g])
+        f0, f1 = self._cofactors(f, var)
+        g0, g1 = self._cofactors(g, var)
+        if (variables >> var) & 1:
+            result = self.and_exists(f0, g0, variables)
+            if result != 1:
+                result = self.disjoin(result, self.and_exists(f1, g1, variables))
+        else:
+            result = self.mk(var, self.and_exists(f0, g0, variables), self.and_exists(f1, g1, variables))
+        return self._store(key, result)
+
+    def shift(self, f, offset):
+        """ Rename every variable v to v + offset. The renaming must preserve the variable order.
+        """
+        if f <= 1 or offset == 0:
+            return f
+        key = ("shift", f, offset)
+        result = self._lookup(key)
+        if result is not None:
+            return result
+        return self._store(key, self.mk(self.var[f] + offset, self.shift(self.low[f], offset), self.shift(self.high[f], offset)))
+
+    def pick_cube(self, f, variables):
+        """ Return a cube over the variables of the bitmask that implies f.
+            Variables on which the chosen path does not depend are set to false.
+        """
+        if f == 0:
+            raise Exception("Cannot pick from the empty set.")
+        assignment = dict()
+        node = f
+        while node > 1:
+            if self.low[node] != 0:
+                assignment[self.var[node]] = 0
+                node = self.low[node]
+            else:
+                assignment[self.var[node]] = 1
+                node = self.high[node]
+        cube = 1
+        for var in reversed(range(variables.bit_length())):
+            if (variables >> var) & 1:
+                if assignment.get(var, 0):
+                    cube = self.mk(var, 0, cube)
+                else:
+                    cube = self.mk(var, cube, 0)
+        return cube
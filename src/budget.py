@@ -0,0 +1,79 @@
+import os
+import resource
+import time
+
+
+class BudgetExceeded(Exception):
+    """ Raised when a verification exceeds one of its budgets.
+        partial_stats describes how far the verification got.
+    """
+    def __init__(self, name, limit, value, partial_stats):
+        super().__init__(name, limit, value, partial_stats)
+        self.name = name
+        self.limit = limit
+        self.value = value
+        self.partial_stats = partial_stats
+
+    def __str__(self):
+        return "%s budget exceeded: %s > %s" % (self.name, self.value, self.limit)
+
+
+class Budget:
+    """ Limits on the number of states and edges, the resident memory in bytes and the wall time in seconds.
+        A limit of None is unlimited. Time and memory are only measured on every check_interval-th call
+        of check, so the checks are cheap enough for the inner loops. The clock starts when the budget is created.
+    """
+    def __init__(self, max_states=None, max_edges=None, max_memory=None, max_seconds=None, check_interval=256):
+        self.max_states = max_states
+        self.max_edges = max_edges
+        self.max_memory = max_memory
+        self.max_seconds = max_seconds
+        self.check_interval = check_interval
+        self.start = time.perf_counter()
+        self.calls = 0
+        self.phase = None
+        self.num_states = 0
+        self.num_edges = 0
+
+    def check_states(self, num_states):
+        self.num_states = num_states
+        if self.max_states is not None and num_states > self.max_states:
+            raise BudgetExceeded("State", self.max_states, num_states, self.partial_stats())
+
+    def check_edges(self, num_edges):
+        self.num_edges = num_edges
+        if self.max_edges is not None and num_edges > self.max_edges:
+            raise BudgetExceeded("Edge", self.max_edges, num_edges, self.partial_stats())
+
+    def check(self, force=False):
+        """ Check the time and memory limits on every check_interval-th call, or now if force is set.
+        """
+        self.calls += 1
+        if not force and self.calls % self.check_interval:
+            return
+        if self.max_seconds is not None:
+            seconds = self.elapsed()
+            if seconds > self.max_seconds:
+                raise BudgetExceeded("Time", self.max_seconds, round(seconds, 3), self.partial_stats())
+        if self.max_memory is not None:
+            memory = resident_memory()
+            if memory > self.max_memory:
+                raise BudgetExceeded("Memory", self.max_memory, memory, self.partial_stats())
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def partial_stats(self):
+        return {"phase": self.phase, "states": self.num_states, "edges": self.num_edges,
+                "seconds": self.elapsed(), "resident_memory": resident_memory()}
+
+
+def resident_memory():
+    """ Return the current resident memory of the process in bytes, or the peak if the current one is unavailable.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
@@ -0,0 +1,120 @@
+import hashlib
+import itertools
+import sqlite3
+from collections import OrderedDict
+
+
+def _feature_code(rule, index):
+    """ Encode what a rule does with a feature: the required source value,
+        how the target value is set, and whether the rule decrements or increments the feature.
+    """
+    bit = 1 << index
+    if rule.source_mask & bit:
+        source = "1" if rule.source_value & bit else "0"
+    else:
+        source = "-"
+    if rule.free_mask & bit:
+        target = "f"
+    elif rule.forced_mask & bit:
+        target = "1" if rule.forced_value & bit else "0"
+    else:
+        target = "s"
+    # a rule can decrement and increment the same feature, e.g. with e_dec(n), e_unk(n)
+    progress = ""
+    if index in rule.decremented_features:
+        progress += "d"
+    if index in rule.incremented_features:
+        progress += "i"
+    progress = progress or "."
+    return source + target + progress
+
+
+def canonical_form(policy, max_permutations=720):
+    """ Return a canonical text of a policy that does not depend on the names and order of the features,
+        the order of the rules, duplicate rules, and rules that can never be applied.
+        It encodes the compiled rule masks and the decrement/increment classification that determine the verdict.
+
+        Features are ordered by the sorted codes of all rules on them. Features with the same codes
+        are permuted to find the lexicographically smallest form, if there are at most max_permutations orders.
+        Otherwise their original order is kept, so equal policies might get different forms.
+    """
+    num_features = policy.get_num_features()
+    rules = [rule for rule in policy.rules if rule.satisfiable]
+    # duplicate rules must not change the signatures of the features
+    codes = [list(row) for row in set(tuple(_feature_code(rule, index) for index in range(num_features)) for rule in rules)]
+    signatures = [tuple(sorted(row[index] for row in codes)) for index in range(num_features)]
+    order = sorted(range(num_features), key=lambda index: signatures[index])
+    groups = [list(group) for _, group in itertools.groupby(order, key=lambda index: signatures[index])]
+    num_orders = 1
+    for group in groups:
+        for i in range(2, len(group) + 1):
+            num_orders *= i
+    if num_orders > max_permutations:
+        candidates = [order]
+    else:
+        candidates = (list(itertools.chain.from_iterable(permutation))
+                      for permutation in itertools.product(*(itertools.permutations(group) for group in groups)))
+    best = None
+    for candidate in candidates:
+        rows = sorted(set(" ".join(row[index] for index in candidate) for row in codes))
+        form = str(num_features) + "|" + ";".join(rows)
+        if best is None or form < best:
+            best = form
+    return best
+
+
+def canonical_key(policy):
+    # the version invalidates the keys of persistent caches whose forms did not tell decrement and increment apart
+    return hashlib.sha256(("2:" + canonical_form(policy)).encode()).hexdigest()
+
+
+class ResultCache:
+    """ Bounded LRU cache of verdicts keyed by the canonical form of policies.
+        If a path is given, the verdicts are also stored in an sqlite database that survives across runs.
+    """
+    def __init__(self, max_size=10000, path=None):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.connection = None
+        if path is not None:
+            self.connection = sqlite3.connect(path)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, terminating INTEGER NOT NULL)")
+            self.connection.commit()
+
+    def get(self, key):
+        """ Return the cached verdict or None.
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        if self.connection is not None:
+            row = self.connection.execute("SELECT terminating FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._remember(key, bool(row[0]))
+                self.hits += 1
+                return bool(row[0])
+        self.misses += 1
+        return None
+
+    def put(self, key, terminating):
+        self._remember(key, terminating)
+        if self.connection is not None:
+            self.connection.execute("INSERT OR REPLACE INTO results (key, terminating) VALUES (?, ?)", (key, int(terminating)))
+            self.connection.commit()
+
+    def _remember(self, key, terminating):
+        self.entries[key] = terminating
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries)}
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
@@ -2,153 +2,182 @@ import abc
 
 
 class Condition():
-    """
+    """ A condition on the source state in mask form:
+        it is satisfied by the state id s iff s & mask == value.
     """
     def __init__(self, feature):
         self.feature = feature
+        self.mask = 1 << feature.index
+        self.value = 0
 
-    @abc.abstractmethod
-    def is_satisfied(self, state):
-        pass
+    def is_satisfied(self, state_id):
+        return (state_id & self.mask) == self.value
 
 class NegativeBooleanCondition(Condition):
+    name = "c_neg"
+
     def __init__(self, feature):
         super().__init__(feature)
-
-    def is_satisfied(self, state):
-        return self.feature.index in state.index_set
+        self.value = self.mask
 
     def __str__(self):
         return "c_neg(" + self.feature.name + ")"
 
 class PositiveBooleanCondition(Condition):
+    name = "c_pos"
+
     def __init__(self, feature):
         super().__init__(feature)
 
-    def is_satisfied(self, state):
-        return self.feature.index not in state.index_set
-
     def __str__(self):
         return "c_pos(" + self.feature.name + ")"
 
 class EqualNumericalCondition(Condition):
+    name = "c_eq"
+
     def __init__(self, feature):
         super().__init__(feature)
-
-    def is_satisfied(self, state):
-        return self.feature.index in state.index_set
+        self.value = self.mask
 
     def __str__(self):
         return "c_eq(" + self.feature.name + ")"
 
 class GreaterNumericalCondition(Condition):
+    name = "c_gt"
+
     def __init__(self, feature):
         super().__init__(feature)
 
-    def is_satisfied(self, state):
-        return self.feature.index not in state.index_set
-
     def __str__(self):
         return "c_gt(" + self.feature.name + ")"
 
 
 class Effect(abc.ABC):
-    """
+    """ An effect on a (source, target) pair in mask form:
+        source_mask/source_value: source bits that must have a specific value.
+        target_mask/target_value: target bits that are set to a specific value.
+        free_mask: target bits that can take any value.
+        same_mask: target bits that keep the value of the source.
     """
     def __init__(self, feature):
         self.feature = feature
+        self.mask = 1 << feature.index
+        self.source_mask = 0
+        self.source_value = 0
+        self.target_mask = 0
+        self.target_value = 0
+        self.free_mask = 0
+        self.same_mask = 0
 
     @abc.abstractmethod
-    def is_satisfied(self, source, target):
+    def is_satisfied(self, source_id, target_id):
         pass
 
 class PositiveBooleanEffect(Effect):
+    name = "e_pos"
+
     def __init__(self, feature):
         super().__init__(feature)
+        self.target_mask = self.mask
 
-    def is_satisfied(self, source, target):
-        if self.feature.index not in target.index_set:
-            return True
-        return False
+    def is_satisfied(self, source_id, target_id):
+        return (target_id & self.mask) == 0
 
     def __str__(self):
         return "e_pos(" + str(self.feature.name) + ")"
 
 class NegativeBooleanEffect(Effect):
+    name = "e_neg"
+
     def __init__(self, feature):
         super().__init__(feature)
+        self.target_mask = self.mask
+        self.target_value = self.mask
 
-    def is_satisfied(self, source, target):
-        if self.feature.index in target.index_set:
-            return True
-        return False
+    def is_satisfied(self, source_id, target_id):
+        return (target_id & self.mask) != 0
 
     def __str__(self):
         return "e_neg(" + str(self.feature.name) + ")"
 
 class IncrementNumericalEffect(Effect):
+    name = "e_inc"
+
     def __init__(self, feature):
         super().__init__(feature)
+        self.target_mask = self.mask
 
-    def is_satisfied(self, source, target):
+    def is_satisfied(self, source_id, target_id):
         # gt(n) must hold in target
-        if self.feature.index not in target.index_set:
-            return True
-        return False
+        return (target_id & self.mask) == 0
 
     def __str__(self):
         return "e_inc(" + str(self.feature.name) + ")"
 
 class DecrementNumericalEffect(Effect):
+    name = "e_dec"
+
     def __init__(self, feature):
         super().__init__(feature)
+        self.source_mask = self.mask
+        self.free_mask = self.mask
 
-    def is_satisfied(self, source, target):
+    def is_satisfied(self, source_id, target_id):
         # gt(n) or eq(n) may hold in target
         # decrement not applicable if eq(n) holds in source
-        if self.feature.index not in source.index_set:
-            return True
-        return False
+        return (source_id & self.mask) == 0
 
     def __str__(self):
         return "e_dec(" + str(self.feature.name) + ")"
 
 class UnknownBooleanEffect(Effect):
+    name = "e_unk"
+
     def __init__(self, feature):
         super().__init__(feature)
+        self.free_mask = self.mask
 
-    def is_satisfied(self, source, target):
+    def is_satisfied(self, source_id, target_id):
         return True
 
     def __str__(self):
         return "e_unk(" + str(self.feature.name) + ")"
 
 class UnknownNumericalEffect(Effect):
+    name = "e_unk"
+
     def __init__(self, feature):
         super().__init__(feature)
+        self.free_mask = self.mask
 
-    def is_satisfied(self, source, target):
+    def is_satisfied(self, source_id, target_id):
         return True
 
     def __str__(self):
         return "e_unk(" + str(self.feature.name) + ")"
 
 class UnchangedBooleanEffect(Effect):
+    name = "e_same"
+
     def __init__(self, feature):
         super().__init__(feature)
+        self.same_mask = self.mask
 
-    def is_satisfied(self, source, target):
-        return (self.feature.index in source.index_set) == (self.feature.index in target.index_set)
+    def is_satisfied(self, source_id, target_id):
+        return ((source_id ^ target_id) & self.mask) == 0
 
     def __str__(self):
         return "e_same(" + str(self.feature.name) + ")"
 
 class UnchangedNumericalEffect(Effect):
+    name = "e_same"
+
     def __init__(self, feature):
         super().__init__(feature)
+        self.same_mask = self.mask
 
-    def is_satisfied(self, source, target):
-        return (self.feature.index in source.index_set) == (self.feature.index in target.index_set)
+    def is_satisfied(self, source_id, target_id):
+        return ((source_id ^ target_id) & self.mask) == 0
 
     def __str__(self):
         return "e_same(" + str(self.feature.name) + ")"
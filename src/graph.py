@@ -0,0 +1,85 @@
+from array import array
+
+
+def state_typecode(num_states):
+    """ Return the array typecode of the smallest buffer that holds state ids.
+    """
+    return "I" if num_states <= 2 ** 32 else "Q"
+
+
+def rule_typecode(num_rules):
+    """ Return the array typecode of the smallest buffer that holds rule ids.
+    """
+    return "B" if num_rules <= 2 ** 8 else "H" if num_rules <= 2 ** 16 else "I"
+
+
+class Graph:
+    """ Compressed sparse row (CSR) storage of the edges of a policy graph.
+        The outgoing edges of state s are the positions offsets[s], ..., offsets[s + 1] - 1
+        in targets and rule_ids. Removing an edge clears its bit in the alive mask.
+    """
+    def __init__(self, offsets, targets, rule_ids, alive=None):
+        self.offsets = offsets
+        self.targets = targets
+        self.rule_ids = rule_ids
+        self.num_states = len(offsets) - 1
+        self.num_edges = len(targets)
+        if alive is None:
+            alive = bytearray(b"\xff" * ((self.num_edges + 7) // 8))
+        self.alive = alive
+
+    def edge_range(self, source_id):
+        return range(self.offsets[source_id], self.offsets[source_id + 1])
+
+    def is_alive(self, edge):
+        return (self.alive[edge >> 3] >> (edge & 7)) & 1
+
+    def remove_edge(self, edge):
+        self.alive[edge >> 3] &= ~(1 << (edge & 7))
+
+    def alive_edges(self, source_id):
+        """ Return the positions of the alive outgoing edges of a state.
+        """
+        alive = self.alive
+        return [edge for edge in self.edge_range(source_id) if (alive[edge >> 3] >> (edge & 7)) & 1]
+
+    def successors(self, source_id):
+        """ Return the target ids of the alive outgoing edges of a state.
+        """
+        alive = self.alive
+        targets = self.targets
+        return [targets[edge] for edge in self.edge_range(source_id) if (alive[edge >> 3] >> (edge & 7)) & 1]
+
+    def memory_footprint(self):
+        """ Return the number of bytes used by each buffer and per edge.
+        """
+        footprint = {
+            "offsets": len(self.offsets) * self.offsets.itemsize,
+            "targets": len(self.targets) * self.targets.itemsize,
+            "rule_ids": len(self.rule_ids) * self.rule_ids.itemsize,
+            "alive": len(self.alive),
+        }
+        footprint["total"] = sum(footprint.values())
+        footprint["per_edge"] = footprint["total"] / self.num_edges if self.num_edges else 0.0
+        return footprint
+
+
+class GraphBuilder:
+    """ Collects the outgoing edges of the states in increasing order of their ids.
+    """
+    def __init__(self, num_states, num_rules):
+        self.offsets = array("Q", [0])
+        self.targets = array(state_typecode(num_states))
+        self.rule_ids = array(rule_typecode(num_rules))
+
+    def add_edge(self, target_id, rule_id):
+        self.targets.append(target_id)
+        self.rule_ids.append(rule_id)
+
+    def end_state(self):
+        """ Close the outgoing edges of the current state.
+        """
+        self.offsets.append(len(self.targets))
+
+    def build(self):
+        return Graph(self.offsets, self.targets, self.rule_ids)
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+from .graph import Graph
+
+
+MAGIC = b"SIEVEGRF"
+VERSION = 1
+# magic, version, number of features, states, edges and rules, typecodes of offsets, targets and rule ids, policy hash
+HEADER = struct.Struct("<8sIIQQQccc5x32s")
+ALIGNMENT = 8
+
+
+def policy_hash(policy):
+    """ Hash of everything the graph depends on: the features and the rules in their order.
+    """
+    description = json.dumps([policy.boolean_names, policy.numerical_names, policy.describe()])
+    return hashlib.sha256(description.encode()).digest()
+
+
+def _aligned(position):
+    return (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def save_graph(path, graph, policy):
+    """ Write the CSR buffers of a graph to a versioned binary file. The buffers are stored in native byte order.
+        The file is written to a temporary path first and then renamed, so readers never see a partial file.
+    """
+    buffers = [graph.offsets, graph.targets, graph.rule_ids]
+    temporary_path = "%s.%d.tmp" % (path, os.getpid())
+    with open(temporary_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, policy.get_num_features(), graph.num_states, graph.num_edges, len(policy.rules),
+                            *(b.typecode.encode() for b in buffers), policy_hash(policy)))
+        for b in buffers:
+            f.write(b"\0" * (_aligned(f.tell()) - f.tell()))
+            f.write(memoryview(b).cast("B"))
+    os.replace(temporary_path, path)
+
+
+def load_graph(path, policy):
+    """ Memory-map a graph file. The buffers of the returned graph are views of the mapped pages,
+        so loading is independent of the number of edges and several processes share the pages.
+        Returns None if the file does not exist, has another version, or was built for another policy.
+    """
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        return None
+    if len(mapped) < HEADER.size:
+        return None
+    magic, version, num_features, num_states, num_edges, num_rules, offsets_typecode, targets_typecode, \
+        rule_ids_typecode, digest = HEADER.unpack_from(mapped)
+    if magic != MAGIC or version != VERSION or digest != policy_hash(policy):
+        return None
+    view = memoryview(mapped)
+    buffers = []
+    position = HEADER.size
+    for typecode, length in ((offsets_typecode, num_states + 1), (targets_typecode, num_edges), (rule_ids_typecode, num_edges)):
+        position = _aligned(position)
+        size = length * struct.calcsize(typecode.decode())
+        if position + size > len(mapped):
+            return None
+        buffers.append(view[position:position + size].cast(typecode.decode()))
+        position += size
+    return Graph(*buffers)
@@ -0,0 +1,198 @@
+from collections import defaultdict
+
+from .feature import FeaturesParser
+from .policy_graph import sieve_edges
+from .rule import RulesParser
+from .tarjan import Tarjan
+
+
+class IncrementalVerifier:
+    """ Policy graph over a fixed set of features whose rules are added and removed one at a time.
+
+        The edges are stored per state and tagged with the ids of the rules that induce them.
+        The verifier maintains the sccs of the whole graph, the condensation graph between them
+        and the verdict of each scc. An edit only touches the edges of the edited rule:
+        added edges between sccs can only merge the sccs on a path back to their source,
+        and removed edges inside of an scc can only split that scc.
+        Only the sccs whose edges changed are sieved again.
+    """
+    def __init__(self, boolean_names, numerical_names):
+        self.boolean_names = list(boolean_names)
+        self.numerical_names = list(numerical_names)
+        self.features = FeaturesParser().parse(boolean_names, numerical_names)
+        self.num_states = 2 ** self.features.get_num_features()
+        self.rules = dict()
+        self.next_rule_id = 0
+        # successors[source_id][target_id] and predecessors[target_id][source_id] are sets of rule ids
+        self.successors = defaultdict(dict)
+        self.predecessors = defaultdict(dict)
+        # every state starts in its own scc whose id is the state id
+        self.component_of = list(range(self.num_states))
+        self.members = dict()
+        self.next_component = self.num_states
+        # number of state pairs with an edge between two sccs in the condensation graph
+        self.component_successors = defaultdict(lambda: defaultdict(int))
+        self.component_predecessors = defaultdict(lambda: defaultdict(int))
+        self.dirty = set()
+        self.non_terminating = set()
+
+    def add_rule(self, rule_description):
+        """ Add a rule given in the format of the rules description, e.g., [[c_gt(n)], [e_dec(n)]].
+            Returns the id of the rule.
+        """
+        rules = RulesParser().parse(self.features, "[" + rule_description + "]")
+        if len(rules) != 1:
+            raise Exception("Expected exactly one rule.")
+        rule_id = self.next_rule_id
+        self.next_rule_id += 1
+        self.rules[rule_id] = rules[0]
+        crossing = []
+        for source_id, target_id in self._edges(rules[0]):
+            rule_ids = self.successors[source_id].get(target_id)
+            is_new = rule_ids is None
+            if is_new:
+                rule_ids = self.successors[source_id][target_id] = set()
+                self.predecessors[target_id][source_id] = rule_ids
+            rule_ids.add(rule_id)
+            source_component = self.component_of[source_id]
+            target_component = self.component_of[target_id]
+            if source_component == target_component:
+                self.dirty.add(source_component)
+            elif is_new:
+                self.component_successors[source_component][target_component] += 1
+                self.component_predecessors[target_component][source_component] += 1
+                crossing.append((source_component, target_component))
+        if crossing:
+            self._merge(crossing)
+        return rule_id
+
+    def remove_rule(self, rule_id):
+        """ Remove the rule with the given id.
+        """
+        rule = self.rules.pop(rule_id, None)
+        if rule is None:
+            raise Exception(f"Unknown rule id: {rule_id}")
+        splitting = set()
+        for source_id, target_id in self._edges(rule):
+            rule_ids = self.successors[source_id][target_id]
+            rule_ids.discard(rule_id)
+            if not rule_ids:
+                del self.successors[source_id][target_id]
+                del self.predecessors[target_id][source_id]
+            source_component = self.component_of[source_id]
+            target_component = self.component_of[target_id]
+            if source_component == target_component:
+                self.dirty.add(source_component)
+                if not rule_ids:
+                    splitting.add(source_component)
+            elif not rule_ids:
+                self._decrement(source_component, target_component)
+        for component in splitting:
+            self._split(component)
+
+    def is_terminating(self):
+        """ Sieve the sccs whose edges changed since the last call and combine the verdicts of all sccs.
+        """
+        for component in self.dirty:
+            states = self._members(component)
+            if len(states) > 1 and not self._sieve(states):
+                self.non_terminating.add(component)
+            else:
+                self.non_terminating.discard(component)
+        self.dirty.clear()
+        return not self.non_terminating
+
+    def describe(self):
+        """ Return the current rules in the format of the rules description.
+        """
+        return "[" + ", ".join(rule.describe() for rule in self.rules.values()) + "]"
+
+    def _edges(self, rule):
+        for source_id in rule.sources():
+            for target_id in rule.successors(source_id):
+                yield source_id, target_id
+
+    def _members(self, component):
+        return self.members.get(component, [component])
+
+    def _decrement(self, source_component, target_component):
+        successors = self.component_successors[source_component]
+        successors[target_component] -= 1
+        if successors[target_component] == 0:
+            del successors[target_component]
+            del self.component_predecessors[target_component][source_component]
+
+    def _reach(self, components, neighbors):
+        reached = set(components)
+        stack = list(reached)
+        while stack:
+            for component in neighbors[stack.pop()]:
+                if component not in reached:
+                    reached.add(component)
+                    stack.append(component)
+        return reached
+
+    def _merge(self, crossing):
+        """ Merge the sccs that are on a cycle through one of the added edges between sccs.
+            Such sccs are reachable from the target and reach the source of an added edge.
+        """
+        forward = self._reach([target for _, target in crossing], self.component_successors)
+        backward = self._reach([source for source, _ in crossing], self.component_predecessors)
+        affected = forward & backward
+        if not affected:
+            return
+        cycles = Tarjan().compute_sccs(affected, lambda component: self.component_successors[component].keys())
+        for cycle in cycles:
+            if len(cycle) > 1:
+                states = [state_id for component in cycle for state_id in self._members(component)]
+                self._replace(cycle, [states])
+
+    def _split(self, component):
+        """ Recompute the sccs of an scc from which edges were removed.
+        """
+        states = self._members(component)
+        members = set(states)
+        sccs = Tarjan().compute_sccs(states, lambda state_id: (target_id for target_id in self.successors[state_id]
+                                                               if target_id in members))
+        if len(sccs) > 1:
+            self._replace([component], sccs)
+
+    def _replace(self, old_components, sccs):
+        """ Replace sccs by new sccs over the same states and rebuild their part of the condensation graph.
+        """
+        for component in old_components:
+            for successor in self.component_successors.pop(component, dict()):
+                self.component_predecessors[successor].pop(component, None)
+            for predecessor in self.component_predecessors.pop(component, dict()):
+                self.component_successors[predecessor].pop(component, None)
+            self.members.pop(component, None)
+            self.dirty.discard(component)
+            self.non_terminating.discard(component)
+        new_components = set()
+        for scc in sccs:
+            component = self.next_component
+            self.next_component += 1
+            self.members[component] = scc
+            for state_id in scc:
+                self.component_of[state_id] = component
+            new_components.add(component)
+            self.dirty.add(component)
+        # edges between the new sccs are counted once from their source side
+        for component in new_components:
+            for source_id in self.members[component]:
+                for target_id in self.successors[source_id]:
+                    target_component = self.component_of[target_id]
+                    if target_component != component:
+                        self.component_successors[component][target_component] += 1
+                        self.component_predecessors[target_component][component] += 1
+                for predecessor_id in self.predecessors[source_id]:
+                    predecessor_component = self.component_of[predecessor_id]
+                    if predecessor_component != component and predecessor_component not in new_components:
+                        self.component_successors[predecessor_component][component] += 1
+                        self.component_predecessors[component][predecessor_component] += 1
+
+    def _sieve(self, states):
+        members = set(states)
+        return sieve_edges(states, [(source_id, target_id, rule_id) for source_id in states
+                                    for target_id, rule_ids in self.successors[source_id].items() if target_id in members
+                                    for rule_id in rule_ids], self.rules)
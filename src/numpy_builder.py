@@ -0,0 +1,69 @@
+from array import array
+
+from .graph import Graph, state_typecode, rule_typecode
+
+
+class NumpyGraphBuilder:
+    """ Builds the policy graph with vectorized NumPy operations.
+        For each rule the applicable sources are selected from all state ids at once
+        and their targets are computed by broadcasting the sources over all assignments of the free bits.
+        The edge budget is checked before the edges of a rule are materialized.
+    """
+    def build(self, policy, num_states, budget=None):
+        try:
+            import numpy as np
+        except ImportError:
+            raise Exception("The numpy engine requires NumPy to be installed.")
+        state_dtype = np.dtype(state_typecode(num_states))
+        rule_dtype = np.dtype(rule_typecode(len(policy.rules)))
+        state_ids = np.arange(num_states, dtype=np.uint64)
+        all_sources = []
+        all_targets = []
+        all_rule_ids = []
+        num_edges = 0
+        for rule_id, rule in enumerate(policy.rules):
+            if not rule.satisfiable:
+                continue
+            sources = state_ids[(state_ids & np.uint64(rule.source_mask)) == np.uint64(rule.source_value)]
+            if not len(sources):
+                continue
+            num_edges += len(sources) << bin(rule.free_mask).count("1")
+            if budget is not None:
+                budget.check_edges(num_edges)
+                budget.check(force=True)
+            subsets = self._subsets(np, rule.free_mask)
+            base = (sources & np.uint64(rule.same_mask)) | np.uint64(rule.forced_value)
+            targets = (base[:, None] | subsets[None, :]).ravel()
+            all_sources.append(np.repeat(sources, len(subsets)))
+            all_targets.append(targets)
+            all_rule_ids.append(np.full(len(targets), rule_id, dtype=rule_dtype))
+        if all_sources:
+            sources = np.concatenate(all_sources)
+            order = np.argsort(sources, kind="stable")
+            sources = sources[order]
+            targets = np.concatenate(all_targets)[order].astype(state_dtype)
+            rule_ids = np.concatenate(all_rule_ids)[order]
+        else:
+            sources = np.zeros(0, dtype=np.uint64)
+            targets = np.zeros(0, dtype=state_dtype)
+            rule_ids = np.zeros(0, dtype=rule_dtype)
+        offsets = np.zeros(num_states + 1, dtype=np.uint64)
+        np.cumsum(np.bincount(sources.astype(np.int64), minlength=num_states), out=offsets[1:])
+        return Graph(self._to_array("Q", offsets),
+                     self._to_array(state_typecode(num_states), targets),
+                     self._to_array(rule_typecode(len(policy.rules)), rule_ids))
+
+    def _subsets(self, np, mask):
+        """ Return all subsets of the bits in mask as a vector.
+        """
+        bits = [1 << i for i in range(mask.bit_length()) if mask & (1 << i)]
+        indices = np.arange(2 ** len(bits), dtype=np.uint64)
+        subsets = np.zeros(len(indices), dtype=np.uint64)
+        for j, bit in enumerate(bits):
+            subsets |= ((indices >> np.uint64(j)) & np.uint64(1)) * np.uint64(bit)
+        return subsets
+
+    def _to_array(self, typecode, values):
+        result = array(typecode)
+        result.frombytes(values.astype(typecode).tobytes())
+        return result
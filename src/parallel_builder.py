@@ -0,0 +1,105 @@
+import multiprocessing
+from array import array
+from multiprocessing import resource_tracker, shared_memory
+
+from .budget import BudgetExceeded
+from .graph import Graph, state_typecode, rule_typecode
+from .rule_index import RuleIndex
+
+
+_policy = None
+_rule_index = None
+_abort = None
+
+
+def _initialize_worker(policy, abort):
+    global _policy, _rule_index, _abort
+    _policy = policy
+    _rule_index = RuleIndex(policy)
+    _abort = abort
+
+
+def _build_chunk(task):
+    """ Build the outgoing edges of the sources in [start, end) and write them to a new shared memory block:
+        the number of edges of each source, followed by the targets and the rule ids.
+        Returns the name of the block and the number of edges, or None if the build was aborted.
+    """
+    start, end, num_states = task
+    counts = array("Q")
+    targets = array(state_typecode(num_states))
+    rule_ids = array(rule_typecode(len(_policy.rules)))
+    for source_id in range(start, end):
+        if (source_id - start) % 1024 == 0 and _abort.is_set():
+            return None
+        num_edges = len(targets)
+        for rule_id in _rule_index.applicable_rules(source_id):
+            for target_id in _policy.rules[rule_id].successors(source_id):
+                targets.append(target_id)
+                rule_ids.append(rule_id)
+        counts.append(len(targets) - num_edges)
+    buffers = [counts.tobytes(), targets.tobytes(), rule_ids.tobytes()]
+    block = shared_memory.SharedMemory(create=True, size=max(1, sum(len(b) for b in buffers)))
+    position = 0
+    for b in buffers:
+        block.buf[position:position + len(b)] = b
+        position += len(b)
+    block.close()
+    # the parent process owns the block from now on and unlinks it after merging
+    resource_tracker.unregister(block._name, "shared_memory")
+    return block.name, len(targets)
+
+
+class ParallelGraphBuilder:
+    """ Builds the policy graph in a pool of worker processes.
+        The range of source ids is split into chunks. Each worker returns the edges of its chunk
+        in a shared memory block instead of pickling them, and the chunks are merged in order.
+        If the budget is exceeded, the workers are told to abort and the blocks they still return are unlinked.
+    """
+    def __init__(self, processes=None, chunks_per_process=4):
+        self.processes = processes or multiprocessing.cpu_count()
+        self.chunks_per_process = chunks_per_process
+
+    def build(self, policy, num_states, budget=None):
+        num_chunks = max(1, min(num_states, self.processes * self.chunks_per_process))
+        bounds = [num_states * i // num_chunks for i in range(num_chunks + 1)]
+        tasks = [(bounds[i], bounds[i + 1], num_states) for i in range(num_chunks)]
+        offsets = array("Q", [0])
+        targets = array(state_typecode(num_states))
+        rule_ids = array(rule_typecode(len(policy.rules)))
+        abort = multiprocessing.Event()
+        exceeded = None
+        with multiprocessing.Pool(self.processes, _initialize_worker, (policy, abort)) as pool:
+            # imap keeps the chunks in the order of their sources
+            for (start, end, _), result in zip(tasks, pool.imap(_build_chunk, tasks)):
+                if result is None:
+                    continue
+                name, num_edges = result
+                block = shared_memory.SharedMemory(name=name)
+                if exceeded is not None:
+                    block.close()
+                    block.unlink()
+                    continue
+                try:
+                    num_sources = end - start
+                    counts = array("Q")
+                    counts.frombytes(block.buf[:num_sources * counts.itemsize])
+                    position = num_sources * counts.itemsize
+                    for count in counts:
+                        offsets.append(offsets[-1] + count)
+                    size = num_edges * targets.itemsize
+                    targets.frombytes(block.buf[position:position + size])
+                    position += size
+                    rule_ids.frombytes(block.buf[position:position + num_edges * rule_ids.itemsize])
+                finally:
+                    block.close()
+                    block.unlink()
+                if budget is not None:
+                    try:
+                        budget.check_edges(len(targets))
+                        budget.check(force=True)
+                    except BudgetExceeded as e:
+                        exceeded = e
+                        abort.set()
+        if exceeded is not None:
+            raise exceeded
+        return Graph(offsets, targets, rule_ids)
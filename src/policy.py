@@ -2,10 +2,37 @@ from .feature import FeaturesParser
 from .rule import RulesParser
 
 
+def parse_names(description):
+    """ Parse a list of feature names, e.g., [b, c], or return the names if they are already a list.
+    """
+    if isinstance(description, str):
+        return [x.strip() for x in description.strip('][').split(',') if x]
+    return list(description)
+
+
 class Policy:
+    """ rules_description is either a rules description, e.g., [[[c_gt(n)],[e_dec(n)]]],
+        or a list of structured rules over feature indices, e.g., [[[[0, "c_gt"]], [[0, "e_dec"]]]].
+    """
     def __init__(self, boolean_names, numerical_names, rules_description):
+        self.boolean_names = list(boolean_names)
+        self.numerical_names = list(numerical_names)
         self.features = FeaturesParser().parse(boolean_names, numerical_names)
-        self.rules = RulesParser().parse(self.features, rules_description)
+        if isinstance(rules_description, str):
+            self.rules = RulesParser().parse(self.features, rules_description)
+        else:
+            self.rules = RulesParser().parse_structured(self.features, rules_description)
 
     def get_num_features(self):
         return len(self.features.features)
+
+    def describe(self):
+        """ Return the rules in the format of the rules description.
+        """
+        return "[" + ", ".join(rule.describe() for rule in self.rules) + "]"
+
+    def to_structured(self):
+        """ Return the rules as lists of (feature index, name) pairs, the inverse of the structured input.
+        """
+        return [[[[c.feature.index, c.name] for c in rule.conditions], [[e.feature.index, e.name] for e in rule.effects]]
+                for rule in self.rules]
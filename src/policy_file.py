@@ -0,0 +1,102 @@
+import json
+import struct
+
+from .policy import Policy, parse_names
+
+
+MAGIC = b"SIEVEPOL"
+VERSION = 1
+# magic, version, number of boolean features, numerical features and rules
+HEADER = struct.Struct("<8sIIII")
+NAME_LENGTH = struct.Struct("<H")
+# a rule is packed into one byte per feature: the condition code in bits 0-1 and the effect code in bits 2-4
+CONDITION_CODES = {"c_pos": 1, "c_gt": 1, "c_neg": 2, "c_eq": 2}
+EFFECT_CODES = {"e_pos": 1, "e_inc": 1, "e_neg": 2, "e_dec": 2, "e_unk": 3, "e_same": 4}
+BOOLEAN_CONDITIONS = [None, "c_pos", "c_neg"]
+NUMERICAL_CONDITIONS = [None, "c_gt", "c_eq"]
+BOOLEAN_EFFECTS = [None, "e_pos", "e_neg", "e_unk", "e_same"]
+NUMERICAL_EFFECTS = [None, "e_inc", "e_dec", "e_unk", "e_same"]
+
+
+def policy_to_json(policy):
+    return json.dumps({"booleans": policy.boolean_names, "numericals": policy.numerical_names,
+                       "rules": policy.to_structured()})
+
+
+def policy_from_json(text):
+    """ Load a policy from a JSON object with the fields booleans, numericals and rules.
+        booleans and numericals are lists of names or descriptions such as [b, c], as in batch requests.
+        rules is either a rules description or a list of structured rules.
+    """
+    data = json.loads(text)
+    return Policy(parse_names(data["booleans"]), parse_names(data["numericals"]), data["rules"])
+
+
+def policy_to_bytes(policy):
+    """ Pack a policy into the binary format. Each feature can have at most one condition and one effect per rule.
+    """
+    names = policy.boolean_names + policy.numerical_names
+    num_features = len(names)
+    chunks = [HEADER.pack(MAGIC, VERSION, len(policy.boolean_names), len(policy.numerical_names), len(policy.rules))]
+    for name in names:
+        encoded = name.encode()
+        chunks.append(NAME_LENGTH.pack(len(encoded)))
+        chunks.append(encoded)
+    for rule_id, (conditions, effects) in enumerate(policy.to_structured()):
+        row = bytearray(num_features)
+        for index, name in conditions:
+            if row[index] & 3:
+                raise Exception(f"Rule {rule_id} has two conditions on feature {names[index]}.")
+            row[index] |= CONDITION_CODES[name]
+        for index, name in effects:
+            if row[index] >> 2:
+                raise Exception(f"Rule {rule_id} has two effects on feature {names[index]}.")
+            row[index] |= EFFECT_CODES[name] << 2
+        chunks.append(bytes(row))
+    return b"".join(chunks)
+
+
+def policy_from_bytes(data):
+    magic, version, num_booleans, num_numericals, num_rules = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise Exception("Not a policy file of version %d." % VERSION)
+    position = HEADER.size
+    names = []
+    for _ in range(num_booleans + num_numericals):
+        length, = NAME_LENGTH.unpack_from(data, position)
+        position += NAME_LENGTH.size
+        names.append(data[position:position + length].decode())
+        position += length
+    num_features = len(names)
+    if position + num_rules * num_features != len(data):
+        raise Exception("The policy file is truncated or has trailing data.")
+    conditions_of = [BOOLEAN_CONDITIONS] * num_booleans + [NUMERICAL_CONDITIONS] * num_numericals
+    effects_of = [BOOLEAN_EFFECTS] * num_booleans + [NUMERICAL_EFFECTS] * num_numericals
+    rules = []
+    for _ in range(num_rules):
+        row = data[position:position + num_features]
+        position += num_features
+        rules.append([[[index, conditions_of[index][code & 3]] for index, code in enumerate(row) if code & 3],
+                      [[index, effects_of[index][code >> 2]] for index, code in enumerate(row) if code >> 2]])
+    return Policy(names[:num_booleans], names[num_booleans:], rules)
+
+
+def save_policy(path, policy):
+    """ Write a policy in JSON if the path ends with .json and in the binary format otherwise.
+    """
+    if path.endswith(".json"):
+        with open(path, "w") as f:
+            f.write(policy_to_json(policy))
+    else:
+        with open(path, "wb") as f:
+            f.write(policy_to_bytes(policy))
+
+
+def load_policy(path):
+    """ Load a policy in the binary format or in JSON, depending on the first bytes of the file.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data.startswith(MAGIC):
+        return policy_from_bytes(data)
+    return policy_from_json(data.decode())
@@ -1,141 +1,289 @@
-from collections import defaultdict
-from .kosajaru import Kosajaru
-from .feature import IncrementNumericalEffect, DecrementNumericalEffect, NegativeBooleanEffect, PositiveBooleanEffect, UnknownBooleanEffect, UnknownNumericalEffect
+import multiprocessing
+from collections import Counter, defaultdict
+from contextlib import nullcontext
+from .graph import GraphBuilder
+from .graph_file import load_graph, save_graph
+from .numpy_builder import NumpyGraphBuilder
+from .parallel_builder import ParallelGraphBuilder
+from .rule_index import RuleIndex
+from .tarjan import Tarjan
 
 
-class Edge:
-    def __init__(self, source_id, target_id, rule):
-        self.source_id = source_id
-        self.target_id = target_id
-        self.rule = rule
+_policy_graph = None
+
+
+def _initialize_sieve_worker(policy_graph):
+    global _policy_graph
+    _policy_graph = policy_graph
+
+
+def _sieve_component(component):
+    return _policy_graph._sieve_components([component])
+
+
+def sieve_edges(scc, edges, rules):
+    """ Run the Sieve algorithm on a single scc that is given by its states and its edges,
+        a list of (source_id, target_id, rule_id) triples between the states.
+        This is used where no full policy graph exists.
+    """
+    worklist = [(scc, edges)]
+    while worklist:
+        scc, edges = worklist.pop()
+        # if g' is acyclic it is terminating
+        if len(scc) == 1:
+            continue
+        rule_ids = set(rule_id for _, _, rule_id in edges)
+        incremented_features = set()
+        for rule_id in rule_ids:
+            incremented_features.update(rules[rule_id].incremented_features)
+        removable_rules = set(rule_id for rule_id in rule_ids
+                              if rules[rule_id].decremented_features - incremented_features)
+        # if no edges can be removed from g' it is non-terminating
+        if not removable_rules:
+            return False
+        successors = defaultdict(list)
+        for source_id, target_id, rule_id in edges:
+            if rule_id not in removable_rules:
+                successors[source_id].append((target_id, rule_id))
+        for sub_scc in Tarjan().compute_sccs(scc, lambda state_id: (target_id for target_id, _ in successors[state_id])):
+            members = set(sub_scc)
+            worklist.append((sub_scc, [(source_id, target_id, rule_id) for source_id in sub_scc
+                                       for target_id, rule_id in successors[source_id] if target_id in members]))
+    return True
 
 
 class State:
-    def __init__(self, features, index_vec):
+    """ The state id is the bitmask of the state: bit i is set iff c_neg/c_eq holds for feature i.
+        States are only built when they must be printed.
+    """
+    def __init__(self, features, state_id):
         self.features = features
-        self.index_vec = index_vec
-        self.index_set = set(index_vec)
+        self.state_id = state_id
 
     def __str__(self):
-        return str([str(self.features.get_feature_by_index(i)) for i in self.index_vec])
+        return str([str(feature) for feature in self.features.features if self.state_id & (1 << feature.index)])
 
 
 class PolicyGraph:
-    def __init__(self, policy):
+    """ engine selects how the edges are built: "python", "numpy" or "parallel".
+        processes is the number of worker processes of the parallel engine (default: number of CPUs).
+        stats is an optional Stats object that records counters and timings.
+        cache_path is an optional graph file that is memory-mapped if it was built for the same policy,
+        and (re)built otherwise.
+        budget is an optional Budget that is checked during construction and sieve and raises BudgetExceeded.
+    """
+    def __init__(self, policy, engine="python", stats=None, processes=None, cache_path=None, budget=None):
         self.policy = policy
         self.num_features = policy.get_num_features()
         self.num_states = 2 ** self.num_features
+        self.stats = stats
+        self.budget = budget
+        if budget is not None:
+            budget.phase = "construction"
+            budget.check_states(self.num_states)
 
         # add an edge between each state pair for which there exists a compatible rule.
-        self.forward_graph = defaultdict(set)
-        self.backward_graph = defaultdict(set)
-        for source_id in range(self.num_states):
-            source = State(policy.features, self._index_to_propositions(source_id))
-            for target_id in range(self.num_states):
-                target = State(policy.features, self._index_to_propositions(target_id))
-                for rule in policy.rules:
-                    if rule.is_compatible(source, target):
-                        # print("%s, %s, %s" % (source, target, rule))
-                        edge = Edge(source_id, target_id, rule)
-                        self.forward_graph[source_id].add(edge)
-                        self.backward_graph[target_id].add(edge)
-        # print([str(State(self.policy.features, self._index_to_propositions(i))) for i in range(self.num_states)])
-
-    def _index_to_propositions(self, index):
-        """ Compute propositions from a state index.
+        # SCCs are computed with forward edges only, so no backward graph is built.
+        with self._phase("construction"):
+            self.graph = load_graph(cache_path, policy) if cache_path is not None else None
+            if self.graph is None:
+                if engine == "python":
+                    self.graph = self._build_graph()
+                elif engine == "numpy":
+                    self.graph = NumpyGraphBuilder().build(policy, self.num_states, budget)
+                elif engine == "parallel":
+                    self.graph = ParallelGraphBuilder(processes).build(policy, self.num_states, budget)
+                else:
+                    raise Exception(f"Unknown engine: {engine}")
+                if cache_path is not None:
+                    save_graph(cache_path, self.graph, policy)
+        if stats is not None:
+            stats.counters["states"] = self.num_states
+            stats.counters["edges"] = self.graph.num_edges
+            stats.edges_per_rule = dict(sorted(Counter(self.graph.rule_ids).items()))
+        # print([str(State(self.policy.features, i)) for i in range(self.num_states)])
+
+    def _build_graph(self):
+        """ The targets are generated from the compiled rule masks, so only the free bits are enumerated.
+            Only the rules that the index reports as applicable are considered for each source.
         """
-        propositions = []
-        p = 0
-        while index > 0:
-            if index & 1 > 0:
-                propositions.append(p)
-            index >>= 1
-            p += 1
+        builder = GraphBuilder(self.num_states, len(self.policy.rules))
+        rule_index = RuleIndex(self.policy)
+        rules = self.policy.rules
+        budget = self.budget
+        for source_id in range(self.num_states):
+            if budget is not None:
+                budget.check_edges(len(builder.targets))
+                budget.check()
+            for rule_id in rule_index.applicable_rules(source_id):
+                for target_id in rules[rule_id].successors(source_id):
+                    # print("%s, %s, %s" % (source_id, target_id, rule))
+                    builder.add_edge(target_id, rule_id)
+            builder.end_state()
+        return builder.build()
 
-        return propositions
+    def _phase(self, name):
+        return self.stats.phase(name) if self.stats is not None else nullcontext()
 
+    def edges(self):
+        """ Generate the alive edges as (source_id, target_id, rule_id) triples.
+        """
+        for source_id in range(self.num_states):
+            for edge in self.graph.alive_edges(source_id):
+                yield source_id, self.graph.targets[edge], self.graph.rule_ids[edge]
 
     def _print_graphs(self):
         print("Forward graph:")
-        for source_id, edges in self.forward_graph.items():
-            for edge in edges:
-                print("%s %s" % (edge.source_id, edge.target_id))
-        print("Backward graph:")
-        for source_id, edges in self.backward_graph.items():
-            for edge in edges:
-                print("%s %s" % (edge.source_id, edge.target_id))
+        for source_id, target_id, _ in self.edges():
+            print("%s %s" % (source_id, target_id))
         print()
 
 
-    def sieve(self, state_ids):
+    def prune(self, state_ids):
+        """ Iteratively remove states without incoming or outgoing edges, ignoring self-loops.
+            Such states are on no cycle with other states, so they form trivial sccs.
+            Returns the remaining state ids.
+        """
+        state_ids = list(state_ids)
+        remaining = set(state_ids)
+        in_degree = defaultdict(int)
+        out_degree = defaultdict(int)
+        predecessors = defaultdict(list)
+        for source_id in state_ids:
+            for target_id in self.graph.successors(source_id):
+                if target_id != source_id and target_id in remaining:
+                    out_degree[source_id] += 1
+                    in_degree[target_id] += 1
+                    predecessors[target_id].append(source_id)
+        queue = [state_id for state_id in state_ids if in_degree[state_id] == 0 or out_degree[state_id] == 0]
+        while queue:
+            state_id = queue.pop()
+            if state_id not in remaining:
+                continue
+            remaining.discard(state_id)
+            for target_id in self.graph.successors(state_id):
+                if target_id != state_id and target_id in remaining:
+                    in_degree[target_id] -= 1
+                    if in_degree[target_id] == 0:
+                        queue.append(target_id)
+            for source_id in predecessors[state_id]:
+                if source_id in remaining:
+                    out_degree[source_id] -= 1
+                    if out_degree[source_id] == 0:
+                        queue.append(source_id)
+        return [state_id for state_id in state_ids if state_id in remaining]
+
+    def sieve(self, state_ids, processes=None):
         """ Run the Sieve algorithm to compute whether the policy is termination.
+            Components are processed from an explicit worklist. After edges are removed
+            from a component, only that component is split into its new SCCs.
+            If processes is greater than 1, the sccs of the graph are sieved in a pool of worker processes.
         """
-        # 1. Compute strongly connected components
-        sccs = Kosajaru().compute_sccs(state_ids, self.forward_graph, self.backward_graph)
-        # 2. Remove edges between different sccs because they are traversed only once.
-        for scc in sccs:
-            scc_set = set(scc)
-            for source_id in scc:
-                remove = []
-                for edge in self.forward_graph[source_id]:
-                    if edge.target_id not in scc_set:
-                        remove.append(edge)
-                for edge in remove:
-                    self.forward_graph[edge.source_id].discard(edge)
-                    self.backward_graph[edge.target_id].discard(edge)
-        # 3. Call sieve_scc for each strongly connected components g' in SCC(g).
-        #    Return "Non-terminating", if at least one call returns "Non-terminating".
-        #    Return "Terminating", otherwise.
-        for scc in sccs:
-            if not self._sieve_scc(scc):
+        if self.budget is not None:
+            self.budget.phase = "sieve"
+        with self._phase("sieve"):
+            # 1. Compute strongly connected components and remove edges between different sccs
+            #    because they are traversed only once.
+            components = self._split(state_ids)
+            if processes is not None and processes > 1:
+                return self._sieve_components_in_parallel(components, processes)
+            return self._sieve_components(components)
+
+    def _sieve_components(self, worklist):
+        """ Sieve each strongly connected component g'.
+            Return "Non-terminating", if no edges can be removed from some g'.
+            Return "Terminating", otherwise.
+        """
+        while worklist:
+            scc, rule_counts, incremented_counts = worklist.pop()
+            # if g' is acyclic it is terminating
+            if len(scc) == 1:
+                continue
+            if self.budget is not None:
+                self.budget.check(force=True)
+            removable_rules = self._removable_rules(rule_counts, incremented_counts)
+            # if no edges can be removed from g' it is non-terminating
+            if not removable_rules:
                 return False
+            if self.stats is not None:
+                self.stats.counters["sieve_rounds"] += 1
+                self.stats.edges_removed_per_round.append(sum(rule_counts[rule_id] for rule_id in removable_rules))
+            for source_id in scc:
+                for edge in self.graph.alive_edges(source_id):
+                    if self.graph.rule_ids[edge] in removable_rules:
+                        self.graph.remove_edge(edge)
+            # the removed rules have no alive edges left in g'
+            for rule_id in removable_rules:
+                del rule_counts[rule_id]
+                for index in self.policy.rules[rule_id].incremented_features:
+                    incremented_counts[index] -= 1
+            # if at least one edge was removed then continue with the sccs of g'
+            worklist.extend(self._split(scc, (rule_counts, incremented_counts)))
         return True
 
-    def _sieve_scc(self, state_ids):
+    def _sieve_components_in_parallel(self, components, processes):
+        """ Sieve the non-trivial sccs in a pool of worker processes, largest first.
+            The sccs are disjoint and the edges between them are removed, so each worker can sieve
+            its scc on its own copy of the graph. The remaining work is cancelled as soon as some scc is non-terminating.
+            Statistics of the workers are not collected.
         """
-        """
-        # 1. if g' is acyclic return "Terminating"
-        if len(state_ids) == 1:
+        components = sorted((component for component in components if len(component[0]) > 1),
+                            key=lambda component: len(component[0]), reverse=True)
+        if not components:
             return True
-        # 1. Iteratively remove edges.
-        rules = set()
-        for source_id in state_ids:
-            for edge in self.forward_graph[source_id]:
-                rules.add(edge.rule)
-        # Collect rules that decrement some feature that no other rule increments in this scc
-        incremented_features = set()
-        decremented_features = set()
-        decremented_rules = defaultdict(set)
-        for rule in rules:
-            for effect in rule.effects:
-                if isinstance(effect, DecrementNumericalEffect) or \
-                   isinstance(effect, NegativeBooleanEffect):
-                    decremented_features.add(effect.feature.index)
-                    decremented_rules[effect.feature.index].add(rule)
-                elif isinstance(effect, IncrementNumericalEffect) or \
-                     isinstance(effect, UnknownNumericalEffect) or \
-                     isinstance(effect, PositiveBooleanEffect) or \
-                     isinstance(effect, UnknownBooleanEffect):
-                    incremented_features.add(effect.feature.index)
-        decremented_features.difference(incremented_features)
+        with multiprocessing.Pool(processes, _initialize_sieve_worker, (self,)) as pool:
+            for terminating in pool.imap_unordered(_sieve_component, components):
+                if not terminating:
+                    # leaving the with statement terminates the workers
+                    return False
+        return True
+
+    def _split(self, state_ids, counts=None):
+        """ Compute the sccs of the subgraph induced by state_ids and remove the edges between them.
+            Returns the sccs together with the number of alive edges of each rule inside of them
+            and the number of those rules that increment each feature.
+            counts are the up to date counts of state_ids if it is a single component. They are reused
+            without scanning its edges if it is still strongly connected.
+        """
+        with self._phase("scc"):
+            sccs = Tarjan(self.stats).compute_sccs(state_ids, self.graph.successors)
+        if counts is not None and len(sccs) == 1:
+            return [(sccs[0],) + counts]
+        component = dict()
+        for i, scc in enumerate(sccs):
+            for state_id in scc:
+                component[state_id] = i
+        components = []
+        removed = 0
+        rules = self.policy.rules
+        for i, scc in enumerate(sccs):
+            rule_counts = defaultdict(int)
+            incremented_counts = defaultdict(int)
+            for source_id in scc:
+                if self.budget is not None:
+                    self.budget.check()
+                for edge in self.graph.alive_edges(source_id):
+                    if component.get(self.graph.targets[edge]) != i:
+                        self.graph.remove_edge(edge)
+                        removed += 1
+                    else:
+                        rule_id = self.graph.rule_ids[edge]
+                        if rule_id not in rule_counts:
+                            for index in rules[rule_id].incremented_features:
+                                incremented_counts[index] += 1
+                        rule_counts[rule_id] += 1
+            components.append((scc, rule_counts, incremented_counts))
+        if self.stats is not None:
+            self.stats.counters["edges_removed_between_sccs"] += removed
+        return components
+
+    def _removable_rules(self, rule_counts, incremented_counts):
+        """ Return the rules of an scc that decrement some feature that no rule of the scc increments.
+        """
         removable_rules = set()
-        for d in decremented_features:
-            for rule in decremented_rules[d]:
-                removable_rules.add(rule)
-        # Remove edges
-        removed = False
-        for source_id in state_ids:
-            remove = []
-            for edge in self.forward_graph[source_id]:
-                if edge.rule in removable_rules:
-                    remove.append(edge)
-                    removed = True
-            for edge in remove:
-                self.forward_graph[edge.source_id].discard(edge)
-                self.backward_graph[edge.target_id].discard(edge)
-        # 3. if no edges were removed from g' return "Non-terminating"
-        if not removed:
-            return False
-        # 4. if at least one edge was removed then return the result of another call to sieve.
-        else:
-            return self.sieve(state_ids)
+        for rule_id in rule_counts:
+            for index in self.policy.rules[rule_id].decremented_features:
+                if incremented_counts[index] == 0:
+                    removable_rules.add(rule_id)
+                    break
+        return removable_rules
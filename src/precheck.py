@@ -0,0 +1,169 @@
+import itertools
+
+from .feature import BooleanFeature
+
+
+class Witness:
+    """ A cycle of states s_0 -> s_1 -> ... -> s_0 where s_i -> s_i+1 is an edge of rule_ids[i].
+    """
+    def __init__(self, policy, rule_ids, state_ids):
+        self.policy = policy
+        self.rule_ids = rule_ids
+        self.state_ids = state_ids
+
+    def describe_state(self, state_id):
+        """ Return the state as the list of conditions that hold in it.
+        """
+        conditions = []
+        for feature in self.policy.features.features:
+            negative = state_id & (1 << feature.index)
+            if isinstance(feature, BooleanFeature):
+                name = "c_neg" if negative else "c_pos"
+            else:
+                name = "c_eq" if negative else "c_gt"
+            conditions.append("%s(%s)" % (name, feature.name))
+        return "[" + ", ".join(conditions) + "]"
+
+    def __str__(self):
+        lines = ["Witness cycle of %d rules:" % len(self.rule_ids)]
+        for rule_id, state_id in zip(self.rule_ids, self.state_ids):
+            lines.append("  %s" % self.describe_state(state_id))
+            lines.append("    rule %d: %s" % (rule_id, self.policy.rules[rule_id].describe()))
+        lines.append("  %s" % self.describe_state(self.state_ids[0]))
+        return "\n".join(lines)
+
+
+class NonTerminationPrecheck:
+    """ Search short cycles of rules without possible progress before the policy graph is built.
+
+        A cycle of rules r_1, ..., r_k has no possible progress if every feature that some r_i decrements
+        is incremented by some r_j. If the rules also induce a cycle of states with at least two different states,
+        then no rule of the cycle is ever removable from the scc that contains it, so the sieve is non-terminating.
+        A single rule alone only induces self-loops, which the sieve treats as terminating, so k starts at 2.
+
+        The features evolve independently along a cycle of edges. For each of the 2^k sequences of bits
+        that a feature can take in s_1, ..., s_k, the masks of the rules yield the set of features that admit it.
+        A cycle of states exists iff every feature admits some sequence and some feature admits a non-constant one.
+
+        The search must stay cheap compared to building the graph. Cycles of a length k are only searched
+        if R^k for the R candidate rules is at most the 2^n * R rule checks of the construction,
+        and the search gives up after max_cycles rule cycles. Giving up only means that no witness is reported.
+    """
+    def __init__(self, max_length=3, max_cycles=10000):
+        self.max_length = max_length
+        self.max_cycles = max_cycles
+
+    def find_witness(self, policy):
+        """ Return a Witness or None if there is no short cycle without possible progress.
+        """
+        all_mask = (1 << policy.get_num_features()) - 1
+        # a rule that decrements a feature that no rule increments is on no cycle without possible progress
+        incremented_features = set()
+        for rule in policy.rules:
+            if rule.satisfiable:
+                incremented_features.update(rule.incremented_features)
+        rules = [rule_id for rule_id, rule in enumerate(policy.rules)
+                 if rule.satisfiable and rule.decremented_features <= incremented_features]
+        follows = {rule_id: [other_id for other_id in rules if self._can_follow(policy.rules[rule_id], policy.rules[other_id])]
+                   for rule_id in rules}
+        construction_cost = 2 ** policy.get_num_features() * len(policy.rules)
+        num_cycles = 0
+        for length in range(2, self.max_length + 1):
+            if len(rules) ** length > construction_cost:
+                break
+            patterns = list(itertools.product((0, 1), repeat=length))
+            for cycle in self._cycles(policy, rules, follows, length):
+                num_cycles += 1
+                if self.max_cycles is not None and num_cycles > self.max_cycles:
+                    return None
+                if not self._without_progress(policy, cycle):
+                    continue
+                state_ids = self._states(policy, cycle, patterns, all_mask)
+                if state_ids is not None:
+                    return Witness(policy, list(cycle), state_ids)
+        return None
+
+    def _can_follow(self, rule, other):
+        """ Whether the target bits that rule determines agree with the source bits that other requires.
+        """
+        mask, value = self._target(rule, 0, 0)
+        return not ((value ^ other.source_value) & mask & other.source_mask)
+
+    def _target(self, rule, mask, value):
+        """ Return the mask and the values of the target bits of rule that are determined if the source bits
+            of mask have the given values: the forced bits and the kept bits that are known or required.
+        """
+        known_mask = mask | rule.source_mask
+        known_value = (value & mask) | (rule.source_value & rule.source_mask)
+        return (rule.forced_mask | (rule.same_mask & known_mask),
+                rule.forced_value | (rule.same_mask & known_mask & known_value))
+
+    def _cycles(self, policy, rules, follows, length):
+        """ Generate rule sequences that can follow each other cyclically, once per rotation:
+            the first rule has the smallest id. The bits that are determined after each rule
+            are propagated along the sequence, and sequences that contradict them are pruned.
+        """
+        stack = []
+        for rule_id in rules:
+            mask, value = self._target(policy.rules[rule_id], 0, 0)
+            stack.append(([rule_id], mask, value))
+        while stack:
+            cycle, mask, value = stack.pop()
+            if len(cycle) == length:
+                first = policy.rules[cycle[0]]
+                if not ((value ^ first.source_value) & mask & first.source_mask):
+                    yield cycle
+                continue
+            for rule_id in follows[cycle[-1]]:
+                rule = policy.rules[rule_id]
+                if rule_id >= cycle[0] and not ((value ^ rule.source_value) & mask & rule.source_mask):
+                    stack.append((cycle + [rule_id],) + self._target(rule, mask, value))
+
+    def _without_progress(self, policy, cycle):
+        decremented_features = set()
+        incremented_features = set()
+        for rule_id in cycle:
+            decremented_features.update(policy.rules[rule_id].decremented_features)
+            incremented_features.update(policy.rules[rule_id].incremented_features)
+        return decremented_features <= incremented_features
+
+    def _admitted(self, policy, cycle, pattern, all_mask):
+        """ Return the mask of the features that can take the bits of pattern in the states of the cycle.
+        """
+        admitted = all_mask
+        length = len(cycle)
+        for i, rule_id in enumerate(cycle):
+            rule = policy.rules[rule_id]
+            source_bit = pattern[i]
+            target_bit = pattern[(i + 1) % length]
+            source_value = rule.source_value if source_bit else ~rule.source_value
+            forced_value = rule.forced_value if target_bit else ~rule.forced_value
+            admitted &= ~rule.source_mask | source_value
+            admitted &= rule.free_mask | (rule.forced_mask & forced_value) | (rule.same_mask if source_bit == target_bit else 0)
+        return admitted
+
+    def _states(self, policy, cycle, patterns, all_mask):
+        """ Return the state ids of a cycle of states with at least two different states, or None.
+        """
+        admitted = [self._admitted(policy, cycle, pattern, all_mask) for pattern in patterns]
+        covered = 0
+        for mask in admitted:
+            covered |= mask
+        varying = 0
+        for pattern, mask in zip(patterns, admitted):
+            if len(set(pattern)) > 1:
+                varying |= mask
+        if covered != all_mask or varying == 0:
+            return None
+        # the lowest feature that can vary takes a non-constant sequence, the others take the first admitted one
+        varying_bit = varying & -varying
+        state_ids = [0] * len(cycle)
+        for index in range(policy.get_num_features()):
+            bit = 1 << index
+            for pattern, mask in zip(patterns, admitted):
+                if mask & bit and (bit != varying_bit or len(set(pattern)) > 1):
+                    for i, value in enumerate(pattern):
+                        if value:
+                            state_ids[i] |= bit
+                    break
+        return state_ids
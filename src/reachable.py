@@ -0,0 +1,76 @@
+from .policy_graph import sieve_edges
+from .rule import RulesParser
+from .rule_index import RuleIndex
+from .tarjan import Tarjan
+
+
+class ReachablePolicyGraph:
+    """ Policy graph restricted to the states that are reachable from a set of initial states.
+
+        Nothing is built up front: the successors of a state are generated from the rules when Tarjan's algorithm
+        first visits it, and the sccs are computed in the same single forward pass, so neither a backward graph
+        nor any unreachable state is materialized. The set of reachable states is closed under successors,
+        so its sccs are sccs of the full policy graph, and each of them is sieved on its own edges.
+    """
+    def __init__(self, policy, stats=None, budget=None):
+        self.policy = policy
+        self.num_features = policy.get_num_features()
+        self.num_states = 2 ** self.num_features
+        self.stats = stats
+        self.budget = budget
+        self.rule_index = RuleIndex(policy)
+        self.num_reachable = 0
+
+    def initial_states(self, conditions_description):
+        """ Generate the ids of the states that satisfy a list of conditions, e.g., [c_pos(b), c_gt(n)].
+        """
+        mask = 0
+        value = 0
+        for condition in RulesParser().parse_conditions(self.policy.features, conditions_description):
+            if (value ^ condition.value) & mask & condition.mask:
+                return
+            mask |= condition.mask
+            value |= condition.value
+        open_mask = (self.num_states - 1) & ~mask
+        subset = open_mask
+        while True:
+            yield value | subset
+            if subset == 0:
+                break
+            subset = (subset - 1) & open_mask
+
+    def successors(self, state_id):
+        """ Generate the (target_id, rule_id) pairs of the outgoing edges of a state.
+        """
+        for rule_id in self.rule_index.applicable_rules(state_id):
+            for target_id in self.policy.rules[rule_id].successors(state_id):
+                yield target_id, rule_id
+
+    def _visit(self, state_id):
+        self.num_reachable += 1
+        if self.budget is not None:
+            self.budget.check_states(self.num_reachable)
+            self.budget.check()
+        return (target_id for target_id, _ in self.successors(state_id))
+
+    def sieve(self, initial_ids):
+        """ Run the Sieve algorithm on the sccs of the states reachable from initial_ids.
+        """
+        if self.budget is not None:
+            self.budget.phase = "sieve"
+        self.num_reachable = 0
+        sccs = Tarjan(self.stats).compute_reachable_sccs(initial_ids, self._visit)
+        if self.stats is not None:
+            self.stats.counters["reachable_states"] = self.num_reachable
+        for scc in sccs:
+            # if g' is acyclic it is terminating
+            if len(scc) == 1:
+                continue
+            members = set(scc)
+            edges = [(source_id, target_id, rule_id) for source_id in scc
+                     for target_id, rule_id in self.successors(source_id) if target_id in members]
+            if self.budget is not None:
+                self.budget.check_edges(len(edges))
+            if not sieve_edges(scc, edges, self.policy.rules):
+                return False
+        return True
@@ -0,0 +1,64 @@
+from .policy import Policy
+
+
+class ReductionReport:
+    def __init__(self, num_features, removed_features, num_rules, removed_rules):
+        self.num_features = num_features
+        self.removed_features = removed_features
+        self.num_rules = num_rules
+        self.removed_rules = removed_rules
+        # the states of the reduced graph and the states of it that prune removed
+        self.num_states = None
+        self.pruned_states = None
+
+    def __str__(self):
+        lines = ["Removed features: %d of %d %s" % (len(self.removed_features), self.num_features, self.removed_features),
+                 "Removed rules: %d of %d" % (self.removed_rules, self.num_rules)]
+        num_original_states = 2 ** self.num_features
+        num_reduced_states = 2 ** (self.num_features - len(self.removed_features))
+        lines.append("Removed states by feature reduction: %d of %d" % (num_original_states - num_reduced_states, num_original_states))
+        if self.num_states is not None:
+            lines.append("Pruned states: %d of %d" % (self.pruned_states, self.num_states))
+        return "\n".join(lines)
+
+
+class PolicyReducer:
+    """ Removes features that do not influence which rules apply nor the termination verdict.
+
+        A feature is irrelevant if no rule has a condition on it and every rule
+        either keeps its value or sets it to an unknown value (e_unk).
+        No rule can decrement an irrelevant feature, so it never makes a rule removable.
+        The graph with irrelevant features consists of copies of the reduced graph that are
+        connected by the edges of the rules with e_unk on them. Therefore the irrelevant features
+        are replaced by a single representative that gets e_unk exactly in these rules.
+        Rules that can never be applied are removed as well.
+    """
+    def reduce(self, policy):
+        features = policy.features.features
+        rules = [rule for rule in policy.rules if rule.satisfiable]
+        irrelevant = []
+        for feature in features:
+            bit = 1 << feature.index
+            if all(not (rule.source_mask & bit) and not (rule.forced_mask & bit) for rule in rules):
+                irrelevant.append(feature)
+        irrelevant_mask = sum(1 << feature.index for feature in irrelevant)
+        representative = None
+        for feature in irrelevant:
+            if any(rule.free_mask & (1 << feature.index) for rule in rules):
+                representative = feature
+                break
+        removed = [feature for feature in irrelevant if feature is not representative]
+        removed_names = set(feature.name for feature in removed)
+        rule_descriptions = []
+        for rule in rules:
+            conditions = [str(c) for c in rule.conditions if c.feature.name not in removed_names]
+            effects = [str(e) for e in rule.effects if e.feature.name not in removed_names and e.feature is not representative]
+            if representative is not None and rule.free_mask & irrelevant_mask:
+                effects.append("e_unk(" + representative.name + ")")
+            rule_descriptions.append("[[" + ", ".join(conditions) + "], [" + ", ".join(effects) + "]]")
+        reduced_policy = Policy([name for name in policy.boolean_names if name not in removed_names],
+                                [name for name in policy.numerical_names if name not in removed_names],
+                                "[" + ", ".join(rule_descriptions) + "]")
+        report = ReductionReport(len(features), [feature.name for feature in removed],
+                                 len(policy.rules), len(policy.rules) - len(rules))
+        return reduced_policy, report
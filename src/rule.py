@@ -1,3 +1,5 @@
+from .feature import IncrementNumericalEffect, DecrementNumericalEffect, NegativeBooleanEffect, PositiveBooleanEffect, UnknownBooleanEffect, UnknownNumericalEffect
+
 
 class Rule:
     """ Rule consists of list of Conditions and list of Effects
@@ -6,74 +8,227 @@ class Rule:
         self.features = features
         self.conditions = conditions
         self.effects = effects
+        self._compile()
+        self._classify_progress()
 
-    def is_compatible(self, source, target):
+    def _compile(self):
+        """ Compile conditions and effects into bit masks over state ids.
+            source_mask/source_value: source bits that must have a specific value.
+            forced_mask/forced_value: target bits that are set to a specific value.
+            free_mask: target bits that can take any value.
+            same_mask: target bits that keep the value of the source.
+        """
+        all_mask = (1 << self.features.get_num_features()) - 1
+        self.satisfiable = True
+        self.source_mask = 0
+        self.source_value = 0
+        self.forced_mask = 0
+        self.forced_value = 0
+        free_mask = 0
+        same_mask = 0
+        checked_mask = 0
         for condition in self.conditions:
-            if not condition.is_satisfied(source):
-                return False
-        checked = set()
+            self._require_source(condition.mask, condition.value)
+        for effect in self.effects:
+            checked_mask |= effect.mask
+            self._require_source(effect.source_mask, effect.source_value)
+            if (self.forced_value ^ effect.target_value) & self.forced_mask & effect.target_mask:
+                self.satisfiable = False
+            self.forced_mask |= effect.target_mask
+            self.forced_value |= effect.target_value
+            free_mask |= effect.free_mask
+            same_mask |= effect.same_mask
+        # features without effect keep their value
+        same_mask |= all_mask & ~checked_mask
+        # a forced bit that must also keep its value requires the forced value in the source
+        self._require_source(same_mask & self.forced_mask, self.forced_value & same_mask)
+        self.free_mask = free_mask & ~(self.forced_mask | same_mask)
+        self.same_mask = all_mask & ~(self.forced_mask | self.free_mask)
+
+    def _require_source(self, mask, value):
+        if (self.source_value ^ value) & self.source_mask & mask:
+            self.satisfiable = False
+        self.source_mask |= mask
+        self.source_value |= value & mask
+
+    def _classify_progress(self):
+        """ Collect the indices of the features that the rule decrements and increments.
+        """
+        self.decremented_features = set()
+        self.incremented_features = set()
         for effect in self.effects:
-            checked.add(effect.feature.index)
-            if not effect.is_satisfied(source, target):
-                return False
-        for index in range(self.features.get_num_features()):
-            if index not in checked:
-                unchanged_effect = self.features.get_feature_by_index(index).make_effect("e_same")
-                if not unchanged_effect.is_satisfied(source, target):
-                    return False
-        return True
+            if isinstance(effect, DecrementNumericalEffect) or \
+               isinstance(effect, NegativeBooleanEffect):
+                self.decremented_features.add(effect.feature.index)
+            elif isinstance(effect, IncrementNumericalEffect) or \
+                 isinstance(effect, UnknownNumericalEffect) or \
+                 isinstance(effect, PositiveBooleanEffect) or \
+                 isinstance(effect, UnknownBooleanEffect):
+                self.incremented_features.add(effect.feature.index)
+
+    def is_applicable(self, source_id):
+        return self.satisfiable and (source_id & self.source_mask) == self.source_value
+
+    def sources(self):
+        """ Generate the ids of all source states in which the rule is applicable.
+            Only the bits without condition are enumerated.
+        """
+        if not self.satisfiable:
+            return
+        open_mask = ((1 << self.features.get_num_features()) - 1) & ~self.source_mask
+        subset = open_mask
+        while True:
+            yield self.source_value | subset
+            if subset == 0:
+                break
+            subset = (subset - 1) & open_mask
+
+    def successors(self, source_id):
+        """ Generate the ids of all target states compatible with the source state.
+            Only the free target bits are enumerated.
+        """
+        if not self.is_applicable(source_id):
+            return
+        base = (source_id & self.same_mask) | self.forced_value
+        subset = self.free_mask
+        while True:
+            yield base | subset
+            if subset == 0:
+                break
+            subset = (subset - 1) & self.free_mask
+
+    def is_compatible(self, source_id, target_id):
+        return self.is_applicable(source_id) and \
+            (target_id & ~self.free_mask) == ((source_id & self.same_mask) | self.forced_value)
+
+    def describe(self):
+        """ Return the rule in the format of the rules description.
+        """
+        return "[[" + ", ".join(str(c) for c in self.conditions) + "], [" + ", ".join(str(e) for e in self.effects) + "]]"
 
     def __str__(self):
         return str([str(c) for c in self.conditions]) + "->" + str([str(e) for e in self.effects])
 
 
 class Tokenizer():
-    """ Tokenizes the rule description.
+    """ Tokenizes the rule description in a single pass.
+        Tokens are (text, position) pairs where position is the index of the token in the description.
     """
     def tokenize(self, text):
         tokens = []
-        word = ""
-        for c in text:
-            if c in {"[", "]", "(", ")"}:
-                if word:
-                    tokens.append(word)
-                    word = ""
-                tokens.append(c)
-            elif c in {" ", "\t", ","}:
-                pass
-            else:
-                word += c
+        start = None
+        for i, c in enumerate(text):
+            if c in "[]()" or c in " \t\n\r,":
+                if start is not None:
+                    tokens.append((text[start:i], start))
+                    start = None
+                if c in "[]()":
+                    tokens.append((c, i))
+            elif start is None:
+                start = i
+        if start is not None:
+            tokens.append((text[start:], start))
         return tokens
 
 
 class RulesParser:
+    """ Recursive descent parser over the token list that advances an index, so parsing is linear.
+        Errors report the position of the offending token in the description.
+    """
     def parse(self, features, rules_description):
-        tokens = Tokenizer().tokenize(rules_description)
-        return [Rule(features, conditions, effects) for conditions, effects in self._parse(features, tokens)]
-
-    def _parse(self, features, tokens):
-        if not tokens:
-            raise Exception("Unexpected EOF.")
-        t = tokens.pop(0)
-        if t == "[":
-            children = []
-            while tokens and tokens[0] != "]":
-                children.append(self._parse(features, tokens))
-            if not tokens:
-                raise Exception("Expected ']'.")
-            assert tokens.pop(0) == "]"
-            return children
-        elif t == "(":
-            if not tokens:
-                raise Exception("Expected condition of effect.")
-            feature = tokens.pop(0)
-            if not tokens:
-                raise Exception("Expected ')'")
-            assert tokens.pop(0) == ")"
-            return feature
-        elif t in ["c_pos", "c_neg", "c_gt", "c_eq"]:
-            return features.get_feature_by_name(self._parse(features, tokens)).make_condition(t)
-        elif t in ["e_pos", "e_neg", "e_dec", "e_inc", "e_unk", "e_same"]:
-            return features.get_feature_by_name(self._parse(features, tokens)).make_effect(t)
-        else:
-            raise Exception(f"Unknown token {t}.")
+        self._start(features, rules_description)
+        rules = self._parse_list(self._parse_rule)
+        self._expect_end()
+        return rules
+
+    def parse_conditions(self, features, conditions_description):
+        """ Parse a list of conditions, e.g., [c_pos(b), c_gt(n)].
+        """
+        self._start(features, conditions_description)
+        conditions = self._parse_list(self._parse_condition)
+        self._expect_end()
+        return conditions
+
+    def _start(self, features, description):
+        self.features = features
+        self.tokens = Tokenizer().tokenize(description)
+        self.end = len(description)
+        self.index = 0
+
+    def _expect_end(self):
+        if self.index < len(self.tokens):
+            self._error("Expected end of description")
+
+    def parse_structured(self, features, rules):
+        """ Build rules from lists of (feature index, name) pairs, e.g., [[[0, "c_gt"]], [[0, "e_dec"]]],
+            without parsing a description.
+        """
+        result = []
+        for conditions, effects in rules:
+            result.append(Rule(features,
+                               [self._feature(features, index).make_condition(name) for index, name in conditions],
+                               [self._feature(features, index).make_effect(name) for index, name in effects]))
+        return result
+
+    def _feature(self, features, index):
+        if not 0 <= index < features.get_num_features():
+            raise Exception(f"There is no feature with index {index}")
+        return features.get_feature_by_index(index)
+
+    def _error(self, message):
+        if self.index < len(self.tokens):
+            token, position = self.tokens[self.index]
+            raise Exception(f"{message}, found '{token}' at position {position}.")
+        raise Exception(f"{message} at position {self.end}.")
+
+    def _expect(self, expected):
+        if self.index == len(self.tokens) or self.tokens[self.index][0] != expected:
+            self._error(f"Expected '{expected}'")
+        self.index += 1
+
+    def _peek(self):
+        return self.tokens[self.index][0] if self.index < len(self.tokens) else None
+
+    def _parse_list(self, parse_element):
+        """ Parse '[' element* ']' where each element is parsed by parse_element.
+        """
+        self._expect("[")
+        elements = []
+        while self.index < len(self.tokens) and self._peek() != "]":
+            elements.append(parse_element())
+        self._expect("]")
+        return elements
+
+    def _parse_rule(self):
+        if self._peek() != "[":
+            self._error("Expected a rule of the form [[conditions], [effects]]")
+        self.index += 1
+        conditions = self._parse_list(self._parse_condition)
+        effects = self._parse_list(self._parse_effect)
+        self._expect("]")
+        return Rule(self.features, conditions, effects)
+
+    def _parse_condition(self):
+        t = self._peek()
+        if t not in ["c_pos", "c_neg", "c_gt", "c_eq"]:
+            self._error("Expected a condition")
+        self.index += 1
+        return self._feature_by_name().make_condition(t)
+
+    def _parse_effect(self):
+        t = self._peek()
+        if t not in ["e_pos", "e_neg", "e_dec", "e_inc", "e_unk", "e_same"]:
+            self._error("Expected an effect")
+        self.index += 1
+        return self._feature_by_name().make_effect(t)
+
+    def _feature_by_name(self):
+        self._expect("(")
+        if self.index == len(self.tokens) or self.tokens[self.index][0] in "[]()":
+            self._error("Expected feature name")
+        name, position = self.tokens[self.index]
+        if name not in self.features.feature_to_index:
+            raise Exception(f"There is no feature with name {name} at position {position}.")
+        self.index += 1
+        self._expect(")")
+        return self.features.get_feature_by_name(name)
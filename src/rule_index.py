@@ -0,0 +1,35 @@
+from collections import defaultdict
+
+
+class RuleIndex:
+    """ Maps a source state to the ids of the rules that are applicable in it.
+
+        Rules are grouped by the mask of their conditions and hashed by the required values,
+        so a lookup costs one dictionary access per distinct condition mask instead of one check per rule.
+        Only the bits of relevant_mask, the features with some condition, decide applicability,
+        so the result is memoized per partial assignment source_id & relevant_mask.
+    """
+    def __init__(self, policy, max_memo_size=1 << 16):
+        self.max_memo_size = max_memo_size
+        self.relevant_mask = 0
+        tables = defaultdict(lambda: defaultdict(list))
+        for rule_id, rule in enumerate(policy.rules):
+            if rule.satisfiable:
+                tables[rule.source_mask][rule.source_value].append(rule_id)
+                self.relevant_mask |= rule.source_mask
+        self.tables = [(mask, dict(table)) for mask, table in tables.items()]
+        self.memo = dict()
+
+    def applicable_rules(self, source_id):
+        """ Return the ids of the applicable rules in increasing order.
+        """
+        key = source_id & self.relevant_mask
+        rule_ids = self.memo.get(key)
+        if rule_ids is None:
+            rule_ids = []
+            for mask, table in self.tables:
+                rule_ids.extend(table.get(key & mask, ()))
+            rule_ids.sort()
+            if len(self.memo) < self.max_memo_size:
+                self.memo[key] = rule_ids
+        return rule_ids
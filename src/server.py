@@ -0,0 +1,204 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import stat
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .batch import _verify_task, parse_request, percentile
+from .cache import canonical_key
+
+
+_policies = OrderedDict()
+_max_policies = 256
+# the server parses requests in several threads
+_policies_lock = threading.Lock()
+
+
+def _cached_policy(request):
+    """ Parse a request, reusing the compiled rules of requests that were seen before in this process.
+    """
+    key = (json.dumps(request["booleans"]), json.dumps(request["numericals"]), json.dumps(request["rules"]))
+    with _policies_lock:
+        policy = _policies.get(key)
+        if policy is not None:
+            _policies.move_to_end(key)
+            return policy
+    policy = parse_request(request)
+    with _policies_lock:
+        _policies[key] = policy
+        if len(_policies) > _max_policies:
+            _policies.popitem(last=False)
+    return policy
+
+
+def _policy_key(request):
+    return canonical_key(_cached_policy(request))
+
+
+def _serve_task(task):
+    return _verify_task(task, _cached_policy)
+
+
+class VerificationServer:
+    """ Long running verification service on a Unix socket.
+
+        Clients send JSON lines in the format of the batch mode: the fields booleans, numericals and rules
+        and an optional id. Each line is answered with a JSON line with the id, the result and the latency,
+        in completion order. The line {"command": "stats"} is answered with the server statistics.
+
+        The worker processes, their compiled policies and the verdict cache stay warm across requests and connections.
+        Requests are parsed in threads of the server to compute their canonical key, so a large request
+        does not block the other connections. Cached verdicts are answered immediately, the others are verified
+        in the worker pool. At most max_pending verifications are in flight; when they are all taken,
+        the server stops reading from the connection until a slot is free, which pushes the backpressure
+        to the clients through the socket.
+
+        limits are the arguments of the Budget of each verification, so a single large policy is answered
+        with Unknown instead of exhausting the memory of its worker. If a worker dies anyway, the requests
+        in flight in the pool are answered with Error and the pool is replaced.
+    """
+    def __init__(self, path, processes=None, timeout=None, engine="python", cache=None, max_pending=None,
+                 max_latencies=10000, limits=None):
+        self.path = path
+        self.processes = processes or os.cpu_count()
+        self.timeout = timeout
+        self.engine = engine
+        self.cache = cache
+        self.limits = limits
+        self.max_pending = max_pending or 4 * self.processes
+        self.latencies = deque(maxlen=max_latencies)
+        self.counts = Counter()
+        self.num_requests = 0
+        self.num_in_flight = 0
+        self.num_blocked = 0
+        self.num_pool_restarts = 0
+
+    def serve(self):
+        """ Serve until the process is interrupted.
+        """
+        try:
+            asyncio.run(self._serve())
+        except KeyboardInterrupt:
+            pass
+
+    async def _serve(self):
+        self.start = time.perf_counter()
+        self.slots = asyncio.Semaphore(self.max_pending)
+        if os.path.exists(self.path) and stat.S_ISSOCK(os.stat(self.path).st_mode):
+            os.unlink(self.path)
+        self.executor = self._start_pool()
+        # one large request must not delay the requests of other connections
+        self.parsers = ThreadPoolExecutor()
+        try:
+            server = await asyncio.start_unix_server(self._handle, path=self.path, limit=2 ** 26)
+            try:
+                async with server:
+                    await server.serve_forever()
+            finally:
+                os.unlink(self.path)
+        finally:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.parsers.shutdown(wait=False, cancel_futures=True)
+
+    def _start_pool(self):
+        # forked workers would inherit the sockets of open connections and keep them from closing
+        return ProcessPoolExecutor(self.processes, multiprocessing.get_context("forkserver"))
+
+    async def _handle(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                self.num_requests += 1
+                result_id = self.num_requests
+                try:
+                    request = await loop.run_in_executor(self.parsers, json.loads, line)
+                    result_id = request.get("id", result_id)
+                    if request.get("command") == "stats":
+                        await self._write(writer, self.stats())
+                        continue
+                    key = await loop.run_in_executor(self.parsers, _policy_key, request)
+                except Exception as e:
+                    await self._write(writer, self._record({"id": result_id, "result": "Error", "error": str(e),
+                                                            "seconds": 0.0}))
+                    continue
+                terminating = self.cache.get(key) if self.cache is not None else None
+                if terminating is not None:
+                    await self._write(writer, self._record({"id": result_id, "seconds": 0.0, "cached": True,
+                                                            "result": "Terminating" if terminating else "Non-terminating"}))
+                    continue
+                self.num_blocked += 1
+                await self.slots.acquire()
+                self.num_blocked -= 1
+                # counted from here, because the task may wait before it starts
+                self.num_in_flight += 1
+                task = asyncio.create_task(self._verify(writer, result_id, request, key))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def _verify(self, writer, result_id, request, key):
+        start = time.perf_counter()
+        executor = self.executor
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                executor, _serve_task, (result_id, request, self.engine, self.timeout, self.limits))
+        except BrokenProcessPool:
+            # all requests in flight fail together, the first one replaces the pool
+            if self.executor is executor:
+                self.executor = self._start_pool()
+                self.num_pool_restarts += 1
+                executor.shutdown(wait=False)
+            result = {"id": result_id, "result": "Error", "error": "The worker process terminated abruptly"}
+        finally:
+            self.num_in_flight -= 1
+            self.slots.release()
+        # the latency includes the time in the queue of the pool
+        result["seconds"] = time.perf_counter() - start
+        if self.cache is not None and result["result"] in ("Terminating", "Non-terminating"):
+            self.cache.put(key, result["result"] == "Terminating")
+        await self._write(writer, self._record(result))
+
+    def _record(self, result):
+        self.latencies.append(result["seconds"])
+        self.counts[result["result"]] += 1
+        return result
+
+    async def _write(self, writer, result):
+        try:
+            writer.write((json.dumps(result) + "\n").encode())
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    def stats(self):
+        latencies = list(self.latencies)
+        stats = {
+            "uptime": time.perf_counter() - self.start,
+            "requests": self.num_requests,
+            "results": dict(self.counts),
+            "in_flight": self.num_in_flight,
+            # verifications that wait for a free worker
+            "queue_depth": max(0, self.num_in_flight - self.processes),
+            "blocked_connections": self.num_blocked,
+            "pool_restarts": self.num_pool_restarts,
+            "p50_latency": percentile(latencies, 50),
+            "p90_latency": percentile(latencies, 90),
+            "p99_latency": percentile(latencies, 99),
+        }
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        return stats
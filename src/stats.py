@@ -0,0 +1,54 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class Stats:
+    """ Opt-in statistics of a verification: counters, scc sizes, sieve rounds and wall time per phase.
+        Components that receive None instead of a Stats object record nothing.
+    """
+    def __init__(self):
+        self.counters = defaultdict(int)
+        self.phase_seconds = defaultdict(float)
+        self.edges_per_rule = dict()
+        # number of sccs by size class: 1, 2-3, 4-7, ...
+        self.scc_sizes = defaultdict(int)
+        self.edges_removed_per_round = []
+        # what decided the verdict: cache, precheck, symbolic, symmetry, reachable or graph
+        self.verdict_source = None
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_seconds[name] += time.perf_counter() - start
+
+    def add_sccs(self, sccs):
+        self.counters["sccs"] += len(sccs)
+        for scc in sccs:
+            self.scc_sizes[2 ** (len(scc).bit_length() - 1)] += 1
+
+    def to_dict(self):
+        return {
+            "verdict_source": self.verdict_source,
+            "counters": dict(self.counters),
+            "phase_seconds": dict(self.phase_seconds),
+            "edges_per_rule": self.edges_per_rule,
+            "scc_sizes": {"%d-%d" % (size, 2 * size - 1) if size > 1 else "1": count
+                          for size, count in sorted(self.scc_sizes.items())},
+            "edges_removed_per_round": self.edges_removed_per_round,
+        }
+
+    def __str__(self):
+        data = self.to_dict()
+        lines = ["verdict source: %s" % data["verdict_source"]]
+        for name, value in data["counters"].items():
+            lines.append("%s: %d" % (name, value))
+        for name, seconds in data["phase_seconds"].items():
+            lines.append("%s time: %.4fs" % (name, seconds))
+        lines.append("edges per rule: %s" % data["edges_per_rule"])
+        lines.append("scc sizes: %s" % data["scc_sizes"])
+        lines.append("edges removed per round: %s" % data["edges_removed_per_round"])
+        return "\n".join(lines)
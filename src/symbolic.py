@@ -0,0 +1,169 @@
+from .bdd import BDD
+
+
+class SymbolicPolicyGraph:
+    """ Symbolic version of the policy graph where sets of states and the transition relation of each rule
+        are binary decision diagrams. Feature i is represented by the current state variable 2 * i
+        and the next state variable 2 * i + 1. A variable is true iff the bit of the feature is set in the state id.
+        budget is an optional Budget whose time and memory limits are checked during construction and sieve.
+        There are no explicit states and edges to count.
+    """
+    def __init__(self, policy, budget=None):
+        self.policy = policy
+        self.budget = budget
+        if budget is not None:
+            budget.phase = "construction"
+        self.num_features = policy.get_num_features()
+        self.num_states = 2 ** self.num_features
+        self.bdd = BDD(2 * self.num_features)
+        self.current_vars = 0
+        self.next_vars = 0
+        for index in range(self.num_features):
+            self.current_vars |= 1 << (2 * index)
+            self.next_vars |= 1 << (2 * index + 1)
+        self.relations = [self._relation(rule) for rule in policy.rules]
+
+    def _relation(self, rule):
+        """ Build the transition relation of a rule from its compiled masks, from the last feature upwards.
+        """
+        if not rule.satisfiable:
+            return 0
+        bdd = self.bdd
+        node = 1
+        for index in reversed(range(self.num_features)):
+            bit = 1 << index
+            current_var = 2 * index
+            next_var = 2 * index + 1
+            if rule.free_mask & bit:
+                from_clear = from_set = node
+            elif rule.forced_mask & bit:
+                if rule.forced_value & bit:
+                    from_clear = from_set = bdd.mk(next_var, 0, node)
+                else:
+                    from_clear = from_set = bdd.mk(next_var, node, 0)
+            else:
+                from_clear = bdd.mk(next_var, node, 0)
+                from_set = bdd.mk(next_var, 0, node)
+            if rule.source_mask & bit:
+                if rule.source_value & bit:
+                    from_clear = 0
+                else:
+                    from_set = 0
+            node = bdd.mk(current_var, from_clear, from_set)
+        if self.budget is not None:
+            self.budget.check()
+        return node
+
+    def state_set(self, state_ids):
+        """ Return the set of the given state ids.
+        """
+        states = 0
+        for state_id in state_ids:
+            cube = 1
+            for index in reversed(range(self.num_features)):
+                if state_id & (1 << index):
+                    cube = self.bdd.mk(2 * index, 0, cube)
+                else:
+                    cube = self.bdd.mk(2 * index, cube, 0)
+            states = self.bdd.disjoin(states, cube)
+        return states
+
+    def _image(self, states, relation):
+        return self.bdd.shift(self.bdd.and_exists(states, relation, self.current_vars), -1)
+
+    def _preimage(self, states, relation):
+        return self.bdd.and_exists(self.bdd.shift(states, 1), relation, self.next_vars)
+
+    def _restrict(self, relation, states):
+        """ Restrict a relation to the edges between states.
+        """
+        return self.bdd.conjoin(self.bdd.conjoin(relation, states), self.bdd.shift(states, 1))
+
+    def _component_relation(self, states, rule_ids):
+        relation = 0
+        for rule_id in rule_ids:
+            relation = self.bdd.disjoin(relation, self.relations[rule_id])
+        return self._restrict(relation, states)
+
+    def _trim(self, states, relation):
+        """ Iteratively remove states without predecessor or without successor since they are on no cycle.
+        """
+        bdd = self.bdd
+        while True:
+            # every iteration computes images of whole sets, so the limits are checked each time
+            if self.budget is not None:
+                self.budget.check(force=True)
+            trimmed = bdd.conjoin(states, bdd.conjoin(self._preimage(states, relation), self._image(states, relation)))
+            if trimmed == states:
+                return states
+            states = trimmed
+
+    def _sccs(self, states, relation):
+        """ Compute the sccs of the states that are on some cycle with the algorithm of Xie and Beerel.
+            States that are on no cycle are trimmed away because they form trivial sccs.
+        """
+        bdd = self.bdd
+        sccs = []
+        worklist = [states]
+        while worklist:
+            states = self._trim(worklist.pop(), relation)
+            if states == 0:
+                continue
+            state = bdd.pick_cube(states, self.current_vars)
+            forward = self._closure(state, states, relation, self._image)
+            backward = self._closure(state, forward, relation, self._preimage)
+            sccs.append(backward)
+            worklist.append(bdd.difference(forward, backward))
+            worklist.append(bdd.difference(states, forward))
+        return sccs
+
+    def _closure(self, initial, states, relation, step):
+        """ Compute the states within states that are reachable from initial with step.
+        """
+        bdd = self.bdd
+        reached = frontier = initial
+        while frontier != 0:
+            if self.budget is not None:
+                self.budget.check(force=True)
+            frontier = bdd.difference(bdd.conjoin(step(frontier, relation), states), reached)
+            reached = bdd.disjoin(reached, frontier)
+        return reached
+
+    def _is_singleton(self, states):
+        return self.bdd.pick_cube(states, self.current_vars) == states
+
+    def sieve(self, states=None):
+        """ Run the Sieve algorithm symbolically to compute whether the policy is terminating.
+            states is a set of states, all states by default.
+            Each component keeps the rules whose edges were not removed from it.
+        """
+        if states is None:
+            states = 1
+        if self.budget is not None:
+            self.budget.phase = "sieve"
+        rule_ids = [rule_id for rule_id, relation in enumerate(self.relations) if relation != 0]
+        worklist = [(scc, rule_ids) for scc in self._sccs(states, self._component_relation(states, rule_ids))]
+        while worklist:
+            scc, rule_ids = worklist.pop()
+            if self.budget is not None:
+                self.budget.check(force=True)
+            # if g' is acyclic it is terminating
+            if self._is_singleton(scc):
+                continue
+            rule_ids = [rule_id for rule_id in rule_ids if self._restrict(self.relations[rule_id], scc) != 0]
+            removable_rules = self._removable_rules(rule_ids)
+            # if no edges can be removed from g' it is non-terminating
+            if not removable_rules:
+                return False
+            rule_ids = [rule_id for rule_id in rule_ids if rule_id not in removable_rules]
+            worklist.extend((sub_scc, rule_ids) for sub_scc in self._sccs(scc, self._component_relation(scc, rule_ids)))
+        return True
+
+    def _removable_rules(self, rule_ids):
+        """ Return the rules that decrement some feature that no rule of the component increments.
+        """
+        incremented_features = set()
+        for rule_id in rule_ids:
+            incremented_features.update(self.policy.rules[rule_id].incremented_features)
+        return set(rule_id for rule_id in rule_ids
+                   if self.policy.rules[rule_id].decremented_features - incremented_features)
@@ -0,0 +1,264 @@
+import itertools
+import math
+
+from .cache import _feature_code
+from .policy_graph import sieve_edges
+from .rule_index import RuleIndex
+from .tarjan import Tarjan
+
+
+class SymmetryReport:
+    def __init__(self, num_states, num_automorphisms, num_orbits, num_sieved_sccs):
+        self.num_states = num_states
+        self.num_automorphisms = num_automorphisms
+        self.num_orbits = num_orbits
+        self.num_sieved_sccs = num_sieved_sccs
+
+    def __str__(self):
+        return "\n".join(["Automorphisms: %d" % self.num_automorphisms,
+                          "Orbits: %d of %d states" % (self.num_orbits, self.num_states),
+                          "Reduction factor: %.2f" % (self.num_states / self.num_orbits),
+                          "Sieved sccs: %d" % self.num_sieved_sccs])
+
+
+def find_interchangeable_slots(policy, max_nodes=10000):
+    """ Return systems of interchangeable slots of features. A system is a list of k slots, tuples of m features,
+        such that swapping the values of any two slots, feature by feature, maps the set of rules onto itself.
+        Hence every permutation of the slots of a system is an automorphism, and the systems generate
+        a group of k_1! * k_2! * ... automorphisms.
+
+        Only features with the same codes across all rules can be exchanged. For a base feature,
+        a swap with each other feature of its group is searched as a product of disjoint transpositions,
+        see _find_swap. The swaps that exchange the same base slot with disjoint slots form a system.
+    """
+    num_features = policy.get_num_features()
+    # duplicate rules must not change the signatures of the features
+    rows = list(set(tuple(_feature_code(rule, index) for index in range(num_features)) for rule in policy.rules if rule.satisfiable))
+    columns = [tuple(row[index] for row in rows) for index in range(num_features)]
+    signatures = [tuple(sorted(column)) for column in columns]
+    order = sorted(range(num_features), key=lambda index: signatures[index])
+    groups = [list(group) for _, group in itertools.groupby(order, key=lambda index: signatures[index])]
+    assigned = set()
+    systems = []
+    for group in groups:
+        for base in group:
+            if base in assigned:
+                continue
+            swaps = []
+            for other in group:
+                if other != base and other not in assigned:
+                    permutation = _find_swap(columns, signatures, base, other, assigned, max_nodes)
+                    if permutation is not None:
+                        swaps.append(permutation)
+            if swaps:
+                slots = _slots(swaps)
+                systems.append(slots)
+                assigned.update(itertools.chain.from_iterable(slots))
+    return systems
+
+
+def _find_swap(columns, signatures, a, b, fixed, max_nodes):
+    """ Search an automorphism that swaps a and b and is a product of disjoint transpositions of features
+        with the same signature. Features in fixed are kept. Features are assigned in order, each to itself first,
+        and a partial assignment is pruned if it does not map the rows projected onto the assigned features
+        onto themselves. Returns the permutation or None if there is none or more than max_nodes are visited.
+    """
+    num_features = len(columns)
+    permutation = [None] * num_features
+    permutation[a] = b
+    permutation[b] = a
+    domain = [a, b]
+    order = [index for index in range(num_features) if index not in (a, b)]
+    num_nodes = 0
+
+    def consistent():
+        return set(zip(*(columns[permutation[index]] for index in domain))) == set(zip(*(columns[index] for index in domain)))
+
+    def extend(position):
+        nonlocal num_nodes
+        num_nodes += 1
+        if num_nodes > max_nodes:
+            return False
+        while position < len(order) and permutation[order[position]] is not None:
+            position += 1
+        if position == len(order):
+            return True
+        index = order[position]
+        candidates = [index]
+        if index not in fixed:
+            candidates.extend(other for other in order[position + 1:] if permutation[other] is None
+                              and other not in fixed and signatures[other] == signatures[index])
+        for other in candidates:
+            permutation[index] = other
+            permutation[other] = index
+            domain.extend({index, other})
+            if consistent() and extend(position + 1):
+                return True
+            del domain[len(domain) - len({index, other}):]
+            permutation[index] = None
+            permutation[other] = None
+        return False
+
+    if not consistent() or not extend(0):
+        return None
+    return permutation
+
+
+def _slots(swaps):
+    """ Return the slots of a system from swaps that share a base feature. The base slot is the set of features
+        that all swaps move, and each swap that exchanges it with a slot disjoint from the others adds that slot.
+        If the swaps do not fit together, the system consists of the two slots of the first swap.
+    """
+    supports = [set(index for index, image in enumerate(permutation) if image != index) for permutation in swaps]
+    if len(swaps) > 1:
+        base = tuple(sorted(set.intersection(*supports)))
+        slots = [base]
+        used = set(base)
+        for permutation, support in zip(swaps, supports):
+            slot = tuple(permutation[index] for index in base)
+            if support == set(base) | set(slot) and not used.intersection(slot):
+                slots.append(slot)
+                used.update(slot)
+        if len(slots) > 2:
+            return slots
+    base = tuple(sorted(index for index in supports[0] if index < swaps[0][index]))
+    return [base, tuple(swaps[0][index] for index in base)]
+
+
+class SymmetricPolicyGraph:
+    """ Verification on the quotient of the policy graph under the automorphisms of the features.
+
+        An automorphism maps every edge s -> t of rule r to an edge of the permuted rule, which decrements
+        and increments the permuted features. Hence it maps each scc to an isomorphic scc with the same verdict,
+        and it suffices to sieve one scc of each orbit of sccs.
+
+        The automorphisms are the permutations of interchangeable slots of features. The representative of an orbit
+        sorts the values of the slots of each system, so it is computed per state without enumerating the group,
+        and the representatives are enumerated directly as sorted tuples of slot values.
+        The sccs of the quotient graph are computed over the representatives. Every scc of the policy graph
+        projects into a single quotient scc. For each quotient scc, the sccs of the states reachable from
+        a representative within the orbits of the quotient scc are computed lazily from the rules. Each scc that
+        contains a state of an orbit not covered yet is sieved exactly, until all orbits of the quotient scc are covered.
+
+        budget is an optional Budget that is checked during the sieve. Its states are the representatives
+        and the states of the current quotient scc that are expanded, its edges are those of the current scc.
+    """
+    def __init__(self, policy, max_nodes=10000, budget=None):
+        self.policy = policy
+        self.budget = budget
+        self.num_features = policy.get_num_features()
+        self.num_states = 2 ** self.num_features
+        self.systems = find_interchangeable_slots(policy, max_nodes)
+        self.rule_index = RuleIndex(policy)
+        self.system_masks = [sum(1 << index for slot in slots for index in slot) for slots in self.systems]
+        assigned = set(index for slots in self.systems for slot in slots for index in slot)
+        self.free_features = [index for index in range(self.num_features) if index not in assigned]
+        self.num_automorphisms = 1
+        self.num_orbits = 2 ** len(self.free_features)
+        for slots in self.systems:
+            self.num_automorphisms *= math.factorial(len(slots))
+            self.num_orbits *= math.comb(2 ** len(slots[0]) + len(slots) - 1, len(slots))
+        self.num_sieved_sccs = 0
+
+    def _slot_value(self, state_id, slot):
+        value = 0
+        for position, index in enumerate(slot):
+            value |= ((state_id >> index) & 1) << position
+        return value
+
+    def _slot_bits(self, value, slot):
+        bits = 0
+        for position, index in enumerate(slot):
+            if value & (1 << position):
+                bits |= 1 << index
+        return bits
+
+    def representative(self, state_id):
+        for slots, mask in zip(self.systems, self.system_masks):
+            values = sorted(self._slot_value(state_id, slot) for slot in slots)
+            state_id &= ~mask
+            for value, slot in zip(values, slots):
+                state_id |= self._slot_bits(value, slot)
+        return state_id
+
+    def representatives(self):
+        """ Generate the representatives of all orbits: the states whose slot values are sorted in each system.
+        """
+        choices = []
+        for slots in self.systems:
+            choices.append([sum(self._slot_bits(value, slot) for value, slot in zip(values, slots))
+                            for values in itertools.combinations_with_replacement(range(2 ** len(slots[0])), len(slots))])
+        for index in self.free_features:
+            choices.append([0, 1 << index])
+        for parts in itertools.product(*choices):
+            yield sum(parts)
+
+    def successors(self, state_id):
+        """ Generate the (target_id, rule_id) pairs of the outgoing edges of a state.
+        """
+        for rule_id in self.rule_index.applicable_rules(state_id):
+            for target_id in self.policy.rules[rule_id].successors(state_id):
+                yield target_id, rule_id
+
+    def report(self):
+        return SymmetryReport(self.num_states, self.num_automorphisms, self.num_orbits, self.num_sieved_sccs)
+
+    def sieve(self):
+        """ Run the Sieve algorithm on one scc of each orbit of sccs of the policy graph.
+        """
+        if self.budget is not None:
+            self.budget.phase = "sieve"
+        quotient_successors = dict()
+
+        def successors(state_id):
+            if self.budget is not None:
+                self.budget.check_states(len(quotient_successors) + 1)
+                self.budget.check()
+            targets = set(self.representative(target_id) for target_id, _ in self.successors(state_id))
+            quotient_successors[state_id] = targets
+            return targets
+
+        for quotient_scc in Tarjan().compute_reachable_sccs(self.representatives(), successors):
+            # orbits without cycle through the quotient graph contain only trivial sccs
+            if len(quotient_scc) == 1 and quotient_scc[0] not in quotient_successors[quotient_scc[0]]:
+                continue
+            if not self._sieve_quotient_scc(quotient_scc):
+                return False
+        return True
+
+    def _sieve_quotient_scc(self, quotient_scc):
+        orbits = set(quotient_scc)
+        uncovered = set(quotient_scc)
+        while uncovered:
+            reachable = self._reachable(min(uncovered), orbits)
+            for scc in Tarjan().compute_sccs(reachable, lambda state_id: (target_id for target_id, _ in self.successors(state_id))):
+                scc_orbits = set(self.representative(state_id) for state_id in scc)
+                if not scc_orbits & uncovered:
+                    continue
+                uncovered -= scc_orbits
+                members = set(scc)
+                edges = [(source_id, target_id, rule_id) for source_id in scc
+                         for target_id, rule_id in self.successors(source_id) if target_id in members]
+                if self.budget is not None:
+                    self.budget.check_edges(len(edges))
+                    self.budget.check(force=True)
+                if len(scc) > 1:
+                    self.num_sieved_sccs += 1
+                if not sieve_edges(scc, edges, self.policy.rules):
+                    return False
+        return True
+
+    def _reachable(self, state_id, orbits):
+        """ Return the states reachable from state_id through states whose orbit is in orbits.
+        """
+        reached = {state_id}
+        stack = [state_id]
+        while stack:
+            if self.budget is not None:
+                self.budget.check_states(len(reached))
+                self.budget.check()
+            for target_id, _ in self.successors(stack.pop()):
+                if target_id not in reached and self.representative(target_id) in orbits:
+                    reached.add(target_id)
+                    stack.append(target_id)
+        return list(reached)
@@ -0,0 +1,33 @@
+import random
+
+
+def synthetic_policy(num_booleans, num_numericals, num_rules, unknown_density=0.3, condition_density=0.3, seed=0):
+    """ Generate a random policy in the input format of main.py.
+        Each rule has a condition on each feature with probability condition_density,
+        an e_unk effect with probability unknown_density, and otherwise a positive or negative
+        effect with probability condition_density.
+        Returns the boolean names, the numerical names and the rules description.
+    """
+    rng = random.Random(seed)
+    boolean_names = ["b%d" % i for i in range(num_booleans)]
+    numerical_names = ["n%d" % i for i in range(num_numericals)]
+    rules = []
+    for _ in range(num_rules):
+        conditions = []
+        effects = []
+        for name in boolean_names:
+            if rng.random() < condition_density:
+                conditions.append(rng.choice(["c_pos", "c_neg"]) + "(" + name + ")")
+            if rng.random() < unknown_density:
+                effects.append("e_unk(" + name + ")")
+            elif rng.random() < condition_density:
+                effects.append(rng.choice(["e_pos", "e_neg"]) + "(" + name + ")")
+        for name in numerical_names:
+            if rng.random() < condition_density:
+                conditions.append(rng.choice(["c_gt", "c_eq"]) + "(" + name + ")")
+            if rng.random() < unknown_density:
+                effects.append("e_unk(" + name + ")")
+            elif rng.random() < condition_density:
+                effects.append(rng.choice(["e_inc", "e_dec"]) + "(" + name + ")")
+        rules.append("[[" + ", ".join(conditions) + "], [" + ", ".join(effects) + "]]")
+    return boolean_names, numerical_names, "[" + ", ".join(rules) + "]"
@@ -0,0 +1,125 @@
+
+class Tarjan:
+    """ Iterative version of https://en.wikipedia.org/wiki/Tarjan%27s_strongly_connected_components_algorithm
+        It needs only forward edges and an explicit stack, so it does not depend on the recursion limit.
+    """
+    def __init__(self, stats=None):
+        self.stats = stats
+
+    def compute_sccs(self, state_ids, successors):
+        """ Compute the strongly connected components of the subgraph induced by state_ids.
+            successors(state_id) returns the target ids of the outgoing edges of a state.
+            Components are returned in reverse topological order.
+        """
+        state_ids = list(state_ids)
+        offsets, targets = self._flatten(state_ids, successors)
+        num_nodes = len(state_ids)
+        index = [-1] * num_nodes
+        lowlink = [0] * num_nodes
+        on_stack = [False] * num_nodes
+        next_edge = offsets[:-1]
+        stack = []
+        sccs = []
+        counter = 0
+        for root in range(num_nodes):
+            if index[root] != -1:
+                continue
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            call_stack = [root]
+            while call_stack:
+                node = call_stack[-1]
+                edge = next_edge[node]
+                if edge < offsets[node + 1]:
+                    next_edge[node] = edge + 1
+                    target = targets[edge]
+                    if index[target] == -1:
+                        index[target] = lowlink[target] = counter
+                        counter += 1
+                        stack.append(target)
+                        on_stack[target] = True
+                        call_stack.append(target)
+                    elif on_stack[target] and index[target] < lowlink[node]:
+                        lowlink[node] = index[target]
+                    continue
+                call_stack.pop()
+                if call_stack:
+                    parent = call_stack[-1]
+                    if lowlink[node] < lowlink[parent]:
+                        lowlink[parent] = lowlink[node]
+                if lowlink[node] == index[node]:
+                    scc = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        scc.append(state_ids[member])
+                        if member == node:
+                            break
+                    sccs.append(scc)
+        if self.stats is not None:
+            self.stats.add_sccs(sccs)
+        return sccs
+
+    def compute_reachable_sccs(self, initial_ids, successors):
+        """ Compute the strongly connected components of the states reachable from initial_ids.
+            The states are discovered on the fly, so successors is only called once for each reachable state
+            and no state outside of the reachable fragment is ever touched.
+            Components are returned in reverse topological order.
+        """
+        index = dict()
+        lowlink = dict()
+        on_stack = set()
+        stack = []
+        sccs = []
+        for root in initial_ids:
+            if root in index:
+                continue
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            call_stack = [(root, iter(successors(root)))]
+            while call_stack:
+                node, targets = call_stack[-1]
+                target = next(targets, None)
+                if target is not None:
+                    if target not in index:
+                        index[target] = lowlink[target] = len(index)
+                        stack.append(target)
+                        on_stack.add(target)
+                        call_stack.append((target, iter(successors(target))))
+                    elif target in on_stack and index[target] < lowlink[node]:
+                        lowlink[node] = index[target]
+                    continue
+                call_stack.pop()
+                if call_stack:
+                    parent = call_stack[-1][0]
+                    if lowlink[node] < lowlink[parent]:
+                        lowlink[parent] = lowlink[node]
+                if lowlink[node] == index[node]:
+                    scc = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        scc.append(member)
+                        if member == node:
+                            break
+                    sccs.append(scc)
+        if self.stats is not None:
+            self.stats.add_sccs(sccs)
+        return sccs
+
+    def _flatten(self, state_ids, successors):
+        """ Build flat adjacency arrays over local node indices restricted to state_ids.
+        """
+        local = {state_id: i for i, state_id in enumerate(state_ids)}
+        offsets = [0]
+        targets = []
+        for state_id in state_ids:
+            for target_id in successors(state_id):
+                target = local.get(target_id)
+                if target is not None:
+                    targets.append(target)
+            offsets.append(len(targets))
+        return offsets, targets
@@ -0,0 +1,48 @@
+from src.domains import DOMAINS
+from src.policy import Policy, parse_names
+from src.policy_graph import PolicyGraph
+
+
+BOOLEAN_EFFECTS = ["e_pos", "e_neg", "e_unk", "e_same"]
+NUMERICAL_EFFECTS = ["e_inc", "e_dec", "e_unk", "e_same"]
+
+
+def domain_policies():
+    """ Return the example policies of the domains as (name, policy) pairs.
+    """
+    return [(name, Policy(parse_names(booleans), parse_names(numericals), rules))
+            for name, (booleans, numericals, rules) in DOMAINS.items()]
+
+
+def random_rule(rng, booleans, numericals):
+    """ Random rule with up to two conditions and two effects per feature,
+        so it can contain contradicting and combined effects such as e_dec(n), e_unk(n).
+    """
+    conditions = []
+    effects = []
+    for names, condition_names, effect_names in ((booleans, ["c_pos", "c_neg"], BOOLEAN_EFFECTS),
+                                                 (numericals, ["c_gt", "c_eq"], NUMERICAL_EFFECTS)):
+        for name in names:
+            if rng.random() < 0.4:
+                conditions.append("%s(%s)" % (rng.choice(condition_names), name))
+            if rng.random() < 0.05:
+                conditions.append("%s(%s)" % (rng.choice(condition_names), name))
+            if rng.random() < 0.5:
+                effects.append("%s(%s)" % (rng.choice(effect_names), name))
+            if rng.random() < 0.15:
+                effects.append("%s(%s)" % (rng.choice(effect_names), name))
+    return "[[%s], [%s]]" % (", ".join(conditions), ", ".join(effects))
+
+
+def random_policy(rng, max_booleans=3, max_numericals=3, max_rules=5):
+    """ Random policy of random rules, see random_rule.
+    """
+    booleans = ["b%d" % i for i in range(rng.randint(0, max_booleans))]
+    numericals = ["n%d" % i for i in range(rng.randint(0 if booleans else 1, max_numericals))]
+    rules = [random_rule(rng, booleans, numericals) for _ in range(rng.randint(1, max_rules))]
+    return Policy(booleans, numericals, "[" + ", ".join(rules) + "]")
+
+
+def full_sieve(policy, engine="python"):
+    policy_graph = PolicyGraph(policy, engine=engine)
+    return policy_graph.sieve(range(policy_graph.num_states))
@@ -0,0 +1,42 @@
+import random
+import unittest
+
+from src.cache import canonical_key
+from src.policy import Policy
+
+from .policies import full_sieve, random_policy
+
+
+class CanonicalKeyTest(unittest.TestCase):
+    def test_decrement_and_increment(self):
+        # e_unk(n) undoes the decrement of e_dec(n) in the same rule
+        non_terminating = Policy(["b"], ["n"], "[[[c_pos(b)], [e_dec(n), e_unk(n), e_neg(b)]], [[c_neg(b)], [e_pos(b)]]]")
+        terminating = Policy(["b"], ["n"], "[[[c_pos(b)], [e_dec(n), e_neg(b)]], [[c_neg(b)], [e_pos(b)]]]")
+        self.assertFalse(full_sieve(non_terminating))
+        self.assertTrue(full_sieve(terminating))
+        self.assertNotEqual(canonical_key(non_terminating), canonical_key(terminating))
+
+    def test_renaming(self):
+        policy = Policy(["b", "c"], ["n"], "[[[c_pos(b), c_gt(n)], [e_neg(b), e_dec(n)]], [[c_neg(b)], [e_pos(b), e_unk(c)]]]")
+        renamed = Policy(["x", "b"], ["m"], "[[[c_neg(b)], [e_unk(x), e_pos(b)]], [[c_gt(m), c_pos(b)], [e_dec(m), e_neg(b)]]]")
+        self.assertEqual(canonical_key(policy), canonical_key(renamed))
+
+    def test_equal_keys_have_equal_verdicts(self):
+        # small policies collide often, so policies with equal keys are compared
+        rng = random.Random(6)
+        verdicts = dict()
+        num_collisions = 0
+        for _ in range(5000):
+            policy = random_policy(rng, max_booleans=2, max_numericals=2, max_rules=3)
+            key = canonical_key(policy)
+            verdict = full_sieve(policy)
+            if key in verdicts:
+                num_collisions += 1
+                self.assertEqual(verdicts[key][0], verdict, "%s\n%s" % (verdicts[key][1], policy.describe()))
+            else:
+                verdicts[key] = (verdict, policy.describe())
+        self.assertGreater(num_collisions, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import importlib.util
+import random
+import unittest
+
+from src.budget import Budget, BudgetExceeded
+from src.policy import Policy
+from src.policy_graph import PolicyGraph
+from src.symbolic import SymbolicPolicyGraph
+
+from .policies import domain_policies, full_sieve, random_policy
+
+
+@unittest.skipIf(importlib.util.find_spec("numpy") is None, "NumPy is not installed")
+class NumpyEngineTest(unittest.TestCase):
+    def assert_same_graph(self, policy):
+        python_graph = PolicyGraph(policy)
+        numpy_graph = PolicyGraph(policy, engine="numpy")
+        self.assertEqual(list(numpy_graph.graph.offsets), list(python_graph.graph.offsets))
+        self.assertEqual(sorted(numpy_graph.edges()), sorted(python_graph.edges()))
+        self.assertEqual(numpy_graph.sieve(range(numpy_graph.num_states)), python_graph.sieve(range(python_graph.num_states)))
+
+    def test_domains(self):
+        for name, policy in domain_policies():
+            with self.subTest(name):
+                self.assert_same_graph(policy)
+
+    def test_random_policies(self):
+        rng = random.Random(2)
+        for _ in range(300):
+            self.assert_same_graph(random_policy(rng))
+
+
+class SymbolicEngineTest(unittest.TestCase):
+    def test_domains(self):
+        for name, policy in domain_policies():
+            with self.subTest(name):
+                self.assertEqual(SymbolicPolicyGraph(policy).sieve(), full_sieve(policy))
+
+    def test_random_policies(self):
+        rng = random.Random(3)
+        for _ in range(300):
+            policy = random_policy(rng)
+            self.assertEqual(SymbolicPolicyGraph(policy).sieve(), full_sieve(policy), policy.describe())
+
+    def test_budget(self):
+        policy = Policy(["b"], ["n"], "[[[c_pos(b)], [e_dec(n), e_neg(b)]], [[c_neg(b)], [e_pos(b)]]]")
+        with self.assertRaises(BudgetExceeded) as context:
+            SymbolicPolicyGraph(policy, budget=Budget(max_seconds=0)).sieve()
+        self.assertEqual(context.exception.name, "Time")
+
+
+if __name__ == "__main__":
+    unittest.main()
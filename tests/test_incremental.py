@@ -0,0 +1,41 @@
+import random
+import unittest
+
+from src.incremental import IncrementalVerifier
+from src.policy import Policy
+
+from .policies import full_sieve, random_rule
+
+
+class IncrementalVerifierTest(unittest.TestCase):
+    def assert_same_verdict(self, verifier, rules):
+        policy = Policy(verifier.boolean_names, verifier.numerical_names, "[" + ", ".join(rules.values()) + "]")
+        self.assertEqual(verifier.is_terminating(), full_sieve(policy), policy.describe())
+
+    def test_random_edits(self):
+        rng = random.Random(7)
+        for _ in range(30):
+            booleans = ["b%d" % i for i in range(rng.randint(0, 3))]
+            numericals = ["n%d" % i for i in range(rng.randint(0 if booleans else 1, 3))]
+            verifier = IncrementalVerifier(booleans, numericals)
+            rules = dict()
+            for _ in range(30):
+                if rules and rng.random() < 0.4:
+                    rule_id = rng.choice(list(rules))
+                    verifier.remove_rule(rule_id)
+                    del rules[rule_id]
+                else:
+                    description = random_rule(rng, booleans, numericals)
+                    rules[verifier.add_rule(description)] = description
+                self.assert_same_verdict(verifier, rules)
+
+    def test_remove_unknown_rule(self):
+        verifier = IncrementalVerifier(["b"], [])
+        rule_id = verifier.add_rule("[[c_pos(b)], [e_neg(b)]]")
+        verifier.remove_rule(rule_id)
+        with self.assertRaises(Exception):
+            verifier.remove_rule(rule_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import os
+import tempfile
+import unittest
+
+from src.policy_file import load_policy, policy_from_json, save_policy
+
+from .policies import domain_policies, full_sieve
+
+
+def structured(policy):
+    # the binary format orders the conditions and effects of a rule by feature
+    return [(sorted(map(tuple, conditions)), sorted(map(tuple, effects))) for conditions, effects in policy.to_structured()]
+
+
+class PolicyFileTest(unittest.TestCase):
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name, policy in domain_policies():
+                for path in (os.path.join(directory, name + ".json"), os.path.join(directory, name + ".pol")):
+                    with self.subTest(path):
+                        save_policy(path, policy)
+                        loaded = load_policy(path)
+                        self.assertEqual(loaded.boolean_names, policy.boolean_names)
+                        self.assertEqual(loaded.numerical_names, policy.numerical_names)
+                        self.assertEqual(structured(loaded), structured(policy))
+
+    def test_name_descriptions(self):
+        policy = policy_from_json('{"booleans": "[b]", "numericals": "[n, m]", '
+                                  '"rules": "[[[c_pos(b), c_gt(n)], [e_neg(b), e_dec(n)]], [[c_neg(b)], [e_pos(b), e_inc(m)]]]"}')
+        self.assertEqual(policy.boolean_names, ["b"])
+        self.assertEqual(policy.numerical_names, ["n", "m"])
+        self.assertTrue(full_sieve(policy))
+
+
+if __name__ == "__main__":
+    unittest.main()
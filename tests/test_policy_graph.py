@@ -0,0 +1,79 @@
+import random
+import unittest
+
+from src.policy import Policy
+from src.policy_graph import PolicyGraph
+
+from .policies import domain_policies, full_sieve, random_policy
+
+
+def reference_edges(policy):
+    """ Enumerate all state pairs and check the conditions and effects one by one,
+        as the policy graph was built before the rules were compiled into masks.
+    """
+    num_features = policy.get_num_features()
+    edges = set()
+    for rule_id, rule in enumerate(policy.rules):
+        checked = set(effect.feature.index for effect in rule.effects)
+        unchanged = [policy.features.get_feature_by_index(index).make_effect("e_same")
+                     for index in range(num_features) if index not in checked]
+        for source_id in range(2 ** num_features):
+            if not all(condition.is_satisfied(source_id) for condition in rule.conditions):
+                continue
+            for target_id in range(2 ** num_features):
+                if all(effect.is_satisfied(source_id, target_id) for effect in rule.effects + unchanged):
+                    edges.add((source_id, target_id, rule_id))
+    return edges
+
+
+class PolicyGraphEdgesTest(unittest.TestCase):
+    def assert_reference_edges(self, policy):
+        expected = reference_edges(policy)
+        edges = list(PolicyGraph(policy).edges())
+        self.assertEqual(len(edges), len(set(edges)))
+        self.assertEqual(set(edges), expected)
+        for source_id, target_id, rule_id in expected:
+            self.assertTrue(policy.rules[rule_id].is_compatible(source_id, target_id))
+
+    def test_domains(self):
+        for name, policy in domain_policies():
+            with self.subTest(name):
+                self.assert_reference_edges(policy)
+
+    def test_combined_effects(self):
+        for rules in ["[[[c_gt(n)], [e_dec(n), e_unk(n)]]]",
+                      "[[[], [e_pos(b), e_same(b)]]]",
+                      "[[[c_neg(b)], [e_pos(b), e_same(b)]]]",
+                      "[[[], [e_inc(n), e_dec(n)]]]",
+                      "[[[], [e_pos(b), e_neg(b)]]]",
+                      "[[[c_pos(b), c_neg(b)], [e_unk(n)]]]",
+                      "[[[c_eq(n)], [e_dec(n)]], [[], [e_unk(b), e_same(b), e_inc(n)]]]"]:
+            with self.subTest(rules):
+                self.assert_reference_edges(Policy(["b"], ["n"], rules))
+
+    def test_random_policies(self):
+        rng = random.Random(1)
+        for _ in range(300):
+            self.assert_reference_edges(random_policy(rng))
+
+
+class RemovableRulesTest(unittest.TestCase):
+    """ A rule is only removable if it decrements a feature that no rule of its scc increments.
+        Before the worklist sieve, every decrementing rule was removed.
+    """
+    def test_domains_terminate(self):
+        for name, policy in domain_policies():
+            with self.subTest(name):
+                self.assertTrue(full_sieve(policy))
+
+    def test_decrement_undone_in_scc(self):
+        self.assertFalse(full_sieve(Policy(["b"], [], "[[[c_pos(b)], [e_neg(b)]], [[c_neg(b)], [e_pos(b)]]]")))
+        self.assertFalse(full_sieve(Policy([], ["n", "m"], "[[[c_gt(n)], [e_dec(n), e_inc(m)]], [[c_gt(m)], [e_dec(m), e_inc(n)]]]")))
+
+    def test_decrement_not_undone(self):
+        self.assertTrue(full_sieve(Policy(["b"], [], "[[[c_pos(b)], [e_neg(b)]]]")))
+        self.assertTrue(full_sieve(Policy([], ["n", "m"], "[[[c_gt(n)], [e_dec(n), e_inc(m)]], [[c_gt(m)], [e_dec(m)]]]")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import random
+import unittest
+
+from src.policy import Policy
+from src.policy_graph import PolicyGraph
+from src.reduction import PolicyReducer
+
+from .policies import domain_policies, full_sieve, random_policy
+
+
+def reduced_sieve(policy):
+    """ Verdict of the reduced policy on the states that remain after pruning, as computed with --reduce.
+    """
+    reduced_policy, report = PolicyReducer().reduce(policy)
+    policy_graph = PolicyGraph(reduced_policy)
+    remaining = policy_graph.prune(range(policy_graph.num_states))
+    return policy_graph.sieve(remaining)
+
+
+class PolicyReducerTest(unittest.TestCase):
+    def test_domains(self):
+        for name, policy in domain_policies():
+            with self.subTest(name):
+                self.assertEqual(reduced_sieve(policy), full_sieve(policy))
+
+    def test_random_policies(self):
+        rng = random.Random(4)
+        for _ in range(300):
+            policy = random_policy(rng, max_booleans=4)
+            self.assertEqual(reduced_sieve(policy), full_sieve(policy), policy.describe())
+
+    def test_irrelevant_features(self):
+        # u0 and u1 are only set to unknown values, so they are replaced by a single representative
+        policy = Policy(["b", "u0", "u1"], ["n"], "[[[c_gt(n)], [e_dec(n), e_unk(u0)]], [[c_pos(b)], [e_neg(b), e_unk(u1)]], "
+                                                 "[[c_neg(b)], [e_pos(b), e_inc(n)]]]")
+        reduced_policy, report = PolicyReducer().reduce(policy)
+        self.assertEqual(report.removed_features, ["u1"])
+        self.assertEqual(reduced_policy.get_num_features(), 3)
+        self.assertFalse(full_sieve(policy))
+        self.assertFalse(reduced_sieve(policy))
+
+if __name__ == "__main__":
+    unittest.main()
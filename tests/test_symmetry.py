@@ -0,0 +1,144 @@
+import itertools
+import random
+import re
+import unittest
+
+from src.budget import Budget, BudgetExceeded
+from src.policy import Policy
+from src.policy_graph import PolicyGraph
+from src.symmetry import SymmetricPolicyGraph
+
+
+def full_sieve(policy):
+    policy_graph = PolicyGraph(policy)
+    return policy_graph.sieve(range(policy_graph.num_states))
+
+
+def counters(num_numericals, num_booleans, terminating=True):
+    """ Interchangeable counters that are decremented one at a time, and booleans that no rule uses.
+        If not terminating, each rule increments all other counters.
+    """
+    rules = []
+    for i in range(num_numericals):
+        effects = ["e_dec(n%d)" % i]
+        if not terminating:
+            effects.extend("e_inc(n%d)" % j for j in range(num_numericals) if j != i)
+        rules.append("[[c_gt(n%d)], [%s]]" % (i, ", ".join(effects)))
+    return Policy(["u%d" % i for i in range(num_booleans)], ["n%d" % i for i in range(num_numericals)], "[" + ", ".join(rules) + "]")
+
+
+def coupled(num_pairs, cyclic=False):
+    """ Pairs of a boolean and a counter that can only be exchanged together.
+        If cyclic, resetting a boolean sets the counter of the next pair to an unknown value,
+        so the pairs can only be rotated.
+    """
+    rules = []
+    for i in range(num_pairs):
+        rules.append("[[c_pos(b%d), c_gt(n%d)], [e_dec(n%d), e_neg(b%d)]]" % (i, i, i, i))
+        rules.append("[[c_neg(b%d)], [e_pos(b%d), e_unk(n%d)]]" % (i, i, (i + 1) % num_pairs if cyclic else i))
+    return Policy(["b%d" % i for i in range(num_pairs)], ["n%d" % i for i in range(num_pairs)], "[" + ", ".join(rules) + "]")
+
+
+def random_symmetric_policy(rng, break_probability=0.3):
+    """ Random rules closed under all permutations of the counters, which are sometimes paired with booleans
+        that are permuted together with them. Some rules have two effects on a feature.
+        With break_probability, one permuted copy of a rule also sets a decremented counter to an unknown value,
+        which leaves the counters with the same conditions and effects but breaks the symmetry.
+    """
+    numericals = ["n%d" % i for i in range(rng.randint(2, 3))]
+    pairs = ["p%d" % i for i in range(len(numericals))] if rng.random() < 0.5 else []
+    booleans = pairs + ["b%d" % i for i in range(rng.randint(0, 2 - len(pairs) // 2))]
+    rules = []
+    for _ in range(rng.randint(1, 3)):
+        conditions = []
+        effects = []
+        for name in booleans:
+            conditions.extend((kind, name) for kind in rng.choice([[], [], ["c_pos"], ["c_neg"]]))
+            effects.extend((kind, name) for kind in rng.choice([[], ["e_unk"], ["e_pos"], ["e_neg"], ["e_neg", "e_unk"]]))
+        for name in numericals:
+            conditions.extend((kind, name) for kind in rng.choice([[], [], ["c_gt"], ["c_eq"]]))
+            effects.extend((kind, name) for kind in rng.choice([[], ["e_unk"], ["e_inc"], ["e_dec"], ["e_dec"],
+                                                                ["e_dec", "e_unk"], ["e_dec", "e_inc"]]))
+        rules.append((conditions, effects))
+    descriptions = set()
+    for permutation in itertools.permutations(range(len(numericals))):
+        renaming = dict(zip(numericals, [numericals[i] for i in permutation]))
+        if pairs:
+            renaming.update(zip(pairs, [pairs[i] for i in permutation]))
+        for conditions, effects in rules:
+            descriptions.add("[[%s], [%s]]" % tuple(", ".join("%s(%s)" % (kind, renaming.get(name, name)) for kind, name in part)
+                                                    for part in (conditions, effects)))
+    descriptions = sorted(descriptions)
+    if rng.random() < break_probability:
+        broken = rng.randrange(len(descriptions))
+        decremented = re.findall(r"e_dec\((\w+)\)", descriptions[broken])
+        if decremented:
+            descriptions[broken] = descriptions[broken][:-2] + ", e_unk(%s)]]" % rng.choice(decremented)
+    return Policy(booleans, numericals, "[" + ", ".join(descriptions) + "]")
+
+
+class SymmetricPolicyGraphTest(unittest.TestCase):
+    def assert_same_verdict(self, policy):
+        symmetric_graph = SymmetricPolicyGraph(policy)
+        self.assertEqual(symmetric_graph.sieve(), full_sieve(policy))
+        return symmetric_graph
+
+    def test_counters(self):
+        symmetric_graph = self.assert_same_verdict(counters(4, 6))
+        self.assertEqual(symmetric_graph.num_automorphisms, 24 * 720)
+        self.assertEqual(symmetric_graph.num_orbits, 5 * 7)
+
+    def test_counters_non_terminating(self):
+        policy = counters(4, 2, terminating=False)
+        self.assertFalse(full_sieve(policy))
+        self.assert_same_verdict(policy)
+
+    def test_coupled(self):
+        symmetric_graph = self.assert_same_verdict(coupled(5))
+        self.assertEqual(symmetric_graph.num_automorphisms, 120)
+
+    def test_coupled_cyclic(self):
+        # the rotation by two pairs is a product of disjoint transpositions
+        symmetric_graph = self.assert_same_verdict(coupled(4, cyclic=True))
+        self.assertEqual(symmetric_graph.num_automorphisms, 2)
+
+    def test_no_symmetry(self):
+        policy = Policy(["b"], ["n"], "[[[c_gt(n)], [e_dec(n)]], [[c_pos(b)], [e_neg(b)]]]")
+        symmetric_graph = self.assert_same_verdict(policy)
+        self.assertEqual(symmetric_graph.num_automorphisms, 1)
+        self.assertEqual(symmetric_graph.num_orbits, 4)
+
+    def test_no_automorphism(self):
+        # the rules of n0 and n1 only differ in e_unk(n1), which undoes the decrement of n1
+        policy = Policy(["b0", "b1"], ["n0", "n1"], "[[[c_pos(b0), c_eq(n1)], [e_dec(n0), e_neg(b0)]], [[c_neg(b0)], [e_pos(b0)]], "
+                                                    "[[c_pos(b1), c_eq(n0)], [e_dec(n1), e_unk(n1), e_neg(b1)]], [[c_neg(b1)], [e_pos(b1)]]]")
+        self.assertFalse(full_sieve(policy))
+        symmetric_graph = self.assert_same_verdict(policy)
+        self.assertEqual(symmetric_graph.num_automorphisms, 1)
+
+    def test_random_symmetric_policies(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            self.assert_same_verdict(random_symmetric_policy(rng))
+
+    def test_random_broken_symmetries(self):
+        # only few broken symmetries change the verdict, so many policies are needed
+        rng = random.Random(1)
+        for _ in range(2000):
+            self.assert_same_verdict(random_symmetric_policy(rng, break_probability=1.0))
+
+    def test_budget(self):
+        with self.assertRaises(BudgetExceeded) as context:
+            SymmetricPolicyGraph(counters(4, 6), budget=Budget(max_states=10)).sieve()
+        self.assertEqual(context.exception.name, "State")
+
+    def test_representatives(self):
+        symmetric_graph = SymmetricPolicyGraph(coupled(3))
+        representatives = list(symmetric_graph.representatives())
+        self.assertEqual(len(representatives), symmetric_graph.num_orbits)
+        self.assertEqual(set(representatives),
+                         set(symmetric_graph.representative(state_id) for state_id in range(symmetric_graph.num_states)))
+
+
+if __name__ == "__main__":
+    unittest.main()